@@ -0,0 +1,87 @@
+import logging
+import time
+
+from conditions import await_condition
+from lazyimport import lazy_import
+
+pyperclip = lazy_import('pyperclip')
+
+
+class ChatChannel:
+    """
+    Sends chat commands (/move, /reset, stat commands) in one paste instead
+    of typing them character by character, and confirms them by polling a
+    frame predicate (see conditions.py) instead of sleeping a fixed time.
+    """
+    def __init__(self, dispatcher, grabber, settings=None):
+        settings = settings or {}
+        self.input = dispatcher
+        self.grabber = grabber
+        self.command_interval = settings.get('command_interval', 0.1)
+        self.poll_interval = settings.get('poll_interval', 0.05)
+        self.timeout = settings.get('confirm_timeout', 3.0)
+        self.settle_delay = settings.get('settle_delay', 0.5)
+
+    def _paste(self, command):
+        """Opens the chat, pastes the command and sends it"""
+        pyperclip.copy(command)
+        self.input.press('enter')
+        self.input.hotkey('ctrl', 'v')
+        self.input.press('enter', delay=self.command_interval, wait=True)
+
+    def wait_for(self, predicate, timeout=None, description=None):
+        """
+        Polls a frame predicate until it returns True.
+        Returns:
+            bool: True if the condition was met before the timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        return await_condition(predicate, timeout, self.grabber, self.poll_interval, description)
+
+    def send(self, command, confirm=None, timeout=None):
+        """
+        Sends a single command.
+        Args:
+            command: Chat command, e.g. '/move lorencia'
+            confirm: Optional frame predicate that becomes True once the game applied the command
+            timeout: Seconds to wait for confirm
+        Returns:
+            bool: True if confirmed (or no confirm given), False on timeout
+        """
+        return self.send_batch([command], confirm, timeout)
+
+    def send_batch(self, commands, confirm=None, timeout=None):
+        """
+        Sends a queue of commands back to back and confirms only the end result.
+        Returns:
+            bool: True if confirmed (or no confirm given), False on timeout
+        """
+        start = time.perf_counter()
+        previous = None
+        try:
+            previous = pyperclip.paste()
+        except Exception:
+            pass
+
+        try:
+            for command in commands:
+                logging.info(f"Chat command: {command}")
+                self._paste(command)
+        finally:
+            if previous is not None:
+                try:
+                    pyperclip.copy(previous)
+                except Exception:
+                    pass
+
+        if confirm is None:
+            time.sleep(self.settle_delay)
+            return True
+
+        confirmed = self.wait_for(confirm, timeout)
+        elapsed = time.perf_counter() - start
+        if confirmed:
+            logging.info(f"{commands[-1]} confirmed in {elapsed:.2f}s")
+        else:
+            logging.warning(f"{commands[-1]} not confirmed after {elapsed:.2f}s")
+        return confirmed
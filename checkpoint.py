@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import time
+
+from lazyimport import lazy_import
+
+np = lazy_import('numpy')
+
+
+class Checkpoint:
+    """
+    Runtime state needed to resume farming after a restart without the cold
+    /move lorencia + full stats read + walk: map, spot, play status, last
+    position, the calibrated layout (elemental reference offset inside the
+    game window), the learned stats window signature and the movement model
+    (play state machine and current /move location). Learned paths and
+    obstacle grids are persisted by their own stores.
+
+    A checkpoint is only trusted when it is recent (max_age seconds) and one
+    frame confirms it (same map and the character near the saved position).
+    """
+    def __init__(self, path=os.path.join('json', 'checkpoint.json'), max_age=900, position_tolerance=15):
+        self.path = path
+        self.max_age = max_age
+        self.position_tolerance = position_tolerance
+
+    def capture(self, bot):
+        layout = bot.layout
+        signature = bot.stats_window.signature
+        return {
+            'timestamp': time.time(),
+            'map': bot.current_map_cache,
+            'spot': (bot.get_game_state() or {}).get('current_location'),
+            'play': bot.play,
+            'position': [bot.current_x, bot.current_y],
+            'reference_point': list(bot.reference_point) if bot.reference_point else None,
+            'elemental_offset': list(layout.elemental_offset) if layout.has_elemental else None,
+            'stats_signature': signature.tolist() if signature is not None else None,
+            'movement': {
+                'state': bot.play_state.state,
+                'map': bot.play_state.map,
+                'spot': list(bot.play_state.spot) if bot.play_state.spot else None,
+                'location': bot.current_location
+            }
+        }
+
+    def save(self, bot):
+        """Atomic write, so a crash mid-save never leaves a truncated checkpoint"""
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.capture(bot), f, indent=4)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            logging.error(f"Error saving checkpoint: {e}")
+            return False
+
+    def load(self):
+        """
+        Returns:
+            dict: Checkpoint data, or None if missing, unreadable or too old
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading checkpoint: {e}")
+            return None
+        age = time.time() - data.get('timestamp', 0)
+        if age > self.max_age:
+            logging.info(f"Checkpoint is {age:.0f}s old, ignoring it")
+            return None
+        return data
+
+    def restore(self, bot, data):
+        """Re-applies the calibrated layout so no template search is needed"""
+        # The offset is window-relative, so it still holds if the window moved
+        bot.ensure_layout(need_elemental=False)
+        if data.get('elemental_offset'):
+            bot.layout.set_elemental_offset(data['elemental_offset'])
+        if data.get('reference_point'):
+            bot.reference_point = tuple(data['reference_point'])
+        if data.get('stats_signature') is not None:
+            bot.stats_window.signature = np.array(data['stats_signature'], dtype=np.float32)
+        bot.current_map_cache = data.get('map')
+        movement = data.get('movement') or {}
+        if movement.get('spot'):
+            # The target stays known; the state itself is re-derived from the frame (see GameBot.resume_from_checkpoint)
+            bot.play_state.map, bot.play_state.spot = movement.get('map'), tuple(movement['spot'])
+        if movement.get('location'):
+            bot.current_location = movement['location']
+
+    def verify(self, bot, data):
+        """
+        Checks the checkpoint against a single frame.
+        Returns:
+            bool: True if the map and position on screen match the checkpoint
+        """
+        frame = bot.frames.grab()
+        position = bot.read_position_on(frame)
+        if position is None:
+            logging.info("Checkpoint check: position unreadable")
+            return False
+
+        saved = data.get('position') or [0, 0]
+        if abs(position[0] - saved[0]) + abs(position[1] - saved[1]) > self.position_tolerance:
+            logging.info(f"Checkpoint check: position {position} far from saved {saved}")
+            return False
+
+        saved_map = data.get('map')
+        if saved_map and bot.maps.knows(saved_map):
+            current_map = bot.identify_map(frame)
+            if current_map != saved_map:
+                logging.info(f"Checkpoint check: map {current_map} != saved {saved_map}")
+                return False
+
+        bot.current_x, bot.current_y = position
+        return True
@@ -0,0 +1,78 @@
+import logging
+import time
+
+
+def await_condition(predicate, timeout, grabber=None, interval=1 / 30, description=None):
+    """
+    Polls a condition at frame rate until it holds, instead of sleeping a fixed time.
+    Args:
+        predicate: callable(frame) when a grabber is given (a fresh frame per poll), else callable()
+        timeout: Maximum seconds to wait
+        grabber: Optional FrameGrabber
+        interval: Seconds between polls
+        description: Name used in logs
+    Returns:
+        bool: True as soon as the condition holds, False on timeout
+    """
+    start = time.monotonic()
+    end_time = start + timeout
+    while True:
+        try:
+            result = predicate(grabber.grab()) if grabber else predicate()
+        except Exception as e:
+            logging.debug(f"Condition {description or predicate} check failed: {e}")
+            result = False
+
+        now = time.monotonic()
+        if result:
+            if description:
+                logging.debug(f"Condition '{description}' met after {now - start:.2f}s")
+            return True
+        if now >= end_time:
+            if description:
+                logging.warning(f"Condition '{description}' not met after {timeout:.1f}s")
+            return False
+        time.sleep(min(interval, max(0.0, end_time - now)))
+
+
+class ScreenConditions:
+    """
+    Frame predicates for await_condition, built on the bot's readers.
+    Each factory returns a callable(frame) -> bool.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+
+    def stats_window_visible(self, visible=True):
+        return lambda frame: self.bot.stats_window.is_open(frame) == visible
+
+    def coordinates_changed(self, before):
+        """True once the HUD coordinates read something different from `before`"""
+        def check(frame):
+            position = self.bot.read_position_on(frame)
+            return position is not None and position != before
+        return check
+
+    def map_changed(self, before, min_jump=30):
+        """True once the coordinates jump far enough to be a teleport to another spot/map"""
+        def check(frame):
+            position = self.bot.read_position_on(frame)
+            if position is None:
+                return False
+            if before is None:
+                return True
+            return abs(position[0] - before[0]) + abs(position[1] - before[1]) >= min_jump
+        return check
+
+    def map_is(self, name):
+        """True once the map classifier recognizes `name` on the HUD"""
+        return lambda frame: self.bot.identify_map(frame) == name
+
+    def level_reads(self, value):
+        return lambda frame: self.bot.read_field_on(frame, 'level') == value
+
+    def available_points_changed(self, before):
+        def check(frame):
+            value = self.bot.read_field_on(frame, 'available_points')
+            return value is not None and value != before
+        return check
@@ -0,0 +1,81 @@
+from layout import ATTRIBUTES
+
+REQUIRED = {
+    'level_thresholds': dict,
+    'stat_distribution': dict,
+    'max_level': int,
+    'reset_level': int,
+    'error_threshold': int,
+    'check_interval': (int, float),
+    'ocr_coordinates': dict
+}
+
+OPTIONAL_SECTIONS = (
+    'preprocess_profiles', 'ocr_profiles', 'ocr_backends', 'retry_policies', 'ocr_voting',
+    'corpus_capture', 'input', 'chat', 'stat_commands', 'layout', 'map_classifier',
+    'path_recorder', 'path_replay', 'path_store', 'obstacles', 'checkpoint', 'logging', 'profiler',
+    'pixel_probes', 'telemetry', 'spot_monitor', 'validation'
+)
+
+STATS_ROIS = ('position', 'level', 'reset', 'available_points')
+
+
+def _is_bbox(value):
+    return isinstance(value, list) and len(value) == 4 and all(isinstance(v, (int, float)) for v in value)
+
+
+def _is_point(value):
+    return isinstance(value, list) and len(value) == 2 and all(isinstance(v, (int, float)) for v in value)
+
+
+def validate_config(config):
+    """
+    Checks config.json before the bot touches the screen, keyboard or OCR.
+    Returns:
+        list: Problems found (empty if the config is usable)
+    """
+    errors = []
+    for key, expected in REQUIRED.items():
+        if key not in config:
+            errors.append(f"missing '{key}'")
+        elif not isinstance(config[key], expected):
+            errors.append(f"'{key}' has the wrong type ({type(config[key]).__name__})")
+    if errors:
+        return errors
+
+    if config['reset_level'] > config['max_level']:
+        errors.append("'reset_level' is higher than 'max_level'")
+
+    for threshold, target in config['level_thresholds'].items():
+        if not threshold.isdigit():
+            errors.append(f"level_thresholds key '{threshold}' is not a level")
+        if not isinstance(target, dict) or not str(target.get('command', '')).startswith('/move '):
+            errors.append(f"level_thresholds['{threshold}'] needs a '/move <map>' command")
+        elif not target.get('spots') and not _is_point(target.get('location')):
+            errors.append(f"level_thresholds['{threshold}'] needs a [x, y] location or a 'spots' list")
+        elif target.get('spots') and not all(isinstance(spot, dict) and _is_point(spot.get('location'))
+                                             for spot in target['spots']):
+            errors.append(f"level_thresholds['{threshold}'] spots need a [x, y] location each")
+
+    total = 0
+    for stat, share in config['stat_distribution'].items():
+        if stat not in ATTRIBUTES:
+            errors.append(f"stat_distribution has unknown attribute '{stat}'")
+        elif not isinstance(share, (int, float)) or share < 0:
+            errors.append(f"stat_distribution['{stat}'] must be a positive number")
+        else:
+            total += share
+    if total > 1.0001:
+        errors.append(f"stat_distribution adds up to {total:.2f} (> 1)")
+
+    coordinates = config['ocr_coordinates']
+    for name in STATS_ROIS:
+        if not _is_bbox(coordinates.get(name)):
+            errors.append(f"ocr_coordinates['{name}'] must be [x1, y1, x2, y2]")
+    if not isinstance(coordinates.get('attributes'), dict):
+        errors.append("ocr_coordinates['attributes'] is missing")
+
+    for section in OPTIONAL_SECTIONS:
+        if section in config and not isinstance(config[section], dict):
+            errors.append(f"'{section}' must be an object")
+    return errors
@@ -0,0 +1,10 @@
+import json
+import os
+
+CONFIG_PATH = os.path.join('json', 'config.json')
+
+
+def save_config(config, path=CONFIG_PATH):
+    """Single writer of config.json for the scripts that update it"""
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=4)
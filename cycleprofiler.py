@@ -0,0 +1,79 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+
+
+class CycleProfiler:
+    """
+    Profiles the next `cycles` cycles of the main loop with cProfile, on
+    demand (toggle(), bound to a hotkey) or every `every_cycles` cycles.
+    The stats go to logs/profile_<time>.prof and a readable top list to
+    logs/profile_<time>.txt.
+
+    The profiler only runs between start_cycle() and end_cycle() on the
+    thread that calls them, so its cost is zero while it is idle.
+    """
+    def __init__(self, directory='logs', cycles=5, every_cycles=0, sort='cumulative', top=40):
+        self.directory = directory
+        self.cycles = cycles
+        self.every_cycles = every_cycles
+        self.sort = sort
+        self.top = top
+        self.requested = False
+        self.profile = None
+        self.remaining = 0
+        self.cycle = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def toggle(self):
+        """Starts profiling at the next cycle, or stops the current run at the end of this cycle"""
+        with self._lock:
+            if self.active:
+                self.remaining = 0
+                logging.info("Profiler: stopping after this cycle")
+            else:
+                self.requested = True
+                logging.info(f"Profiler: profiling the next {self.cycles} cycles")
+
+    def start_cycle(self):
+        self.cycle += 1
+        with self._lock:
+            periodic = self.every_cycles and self.cycle % self.every_cycles == 0
+            if self.active or not (self.requested or periodic):
+                return
+            self.requested = False
+            self.remaining = self.cycles
+            self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def end_cycle(self):
+        if not self.active:
+            return
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining > 0:
+                return
+            profile, self.profile = self.profile, None
+        profile.disable()
+        self._dump(profile)
+
+    def _dump(self, profile):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"profile_{time.strftime('%Y%m%d_%H%M%S')}")
+            profile.dump_stats(base + '.prof')
+            text = io.StringIO()
+            pstats.Stats(profile, stream=text).sort_stats(self.sort).print_stats(self.top)
+            with open(base + '.txt', 'w') as f:
+                f.write(text.getvalue())
+            logging.info(f"Profiler: wrote {base}.prof and {base}.txt")
+        except Exception as e:
+            logging.error(f"Error writing profile: {e}")
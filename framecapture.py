@@ -0,0 +1,74 @@
+import itertools
+import threading
+import time
+
+from lazyimport import lazy_import
+
+np = lazy_import('numpy')
+mss = lazy_import('mss')
+Image = lazy_import('PIL.Image')
+
+
+class Frame:
+    """A full capture of the primary monitor. Coordinates match ImageGrab bboxes."""
+    def __init__(self, frame_id, timestamp, pixels):
+        self.id = frame_id
+        self.timestamp = timestamp
+        self.pixels = pixels  # BGRA array (height, width, 4)
+
+    def crop(self, bbox):
+        """
+        Returns the region (x1, y1, x2, y2) as a PIL RGB image.
+        Only the crop is converted, never the full frame.
+        """
+        x1, y1, x2, y2 = (int(v) for v in bbox)
+        region = self.pixels[y1:y2, x1:x2, 2::-1]
+        return Image.fromarray(np.ascontiguousarray(region))
+
+    def crop_array(self, bbox):
+        """Returns the region as a BGRA array view (no copy)"""
+        x1, y1, x2, y2 = (int(v) for v in bbox)
+        return self.pixels[y1:y2, x1:x2]
+
+
+class FrameGrabber:
+    """
+    Captures frames with mss and shares the latest one between consumers.
+    mss handles are not thread safe, so each thread gets its own.
+    """
+    def __init__(self, monitor_index=1):
+        self.monitor_index = monitor_index
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.last_frame = None
+
+    def _sct(self):
+        if not hasattr(self._local, 'sct'):
+            self._local.sct = mss.mss()
+        return self._local.sct
+
+    def grab(self):
+        """Captures a new frame and makes it the shared latest frame"""
+        sct = self._sct()
+        shot = sct.grab(sct.monitors[self.monitor_index])
+        frame = Frame(next(self._ids), time.time(), np.asarray(shot))
+        with self._lock:
+            self.last_frame = frame
+        return frame
+
+    def latest(self, max_age=0.05):
+        """Returns the shared frame if it is recent enough, otherwise captures a new one"""
+        frame = self.last_frame
+        if frame is not None and time.time() - frame.timestamp <= max_age:
+            return frame
+        return self.grab()
+
+    def grab_burst(self, count, interval=0.0):
+        """Captures `count` consecutive frames"""
+        frames = []
+        for i in range(count):
+            if i and interval:
+                time.sleep(interval)
+            frames.append(self.grab())
+        return frames
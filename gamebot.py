@@ -1,35 +1,93 @@
 import os
-import pyautogui
-import pytesseract
+import math
 import time
 import logging
 import json
-import screeninfo
-import cv2
-import numpy as np
-from PIL import Image, ImageGrab
-from pynput import keyboard
+import random
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from lazyimport import lazy_import
 from pathlearner import PathLearner
+from pathrecorder import PathRecorder
+from pathreplay import PathReplayer
+from checkpoint import Checkpoint
+from configcheck import validate_config
+import logpipeline
+from logpipeline import CycleStats, log_sampled
+from cycleprofiler import CycleProfiler
+from ocrengine import OCREngine, vote
+from framecapture import FrameGrabber
+from layout import RoiLayout, detect_game_window
+from inputdispatcher import InputDispatcher
+from chatchannel import ChatChannel
+from conditions import ScreenConditions, await_condition
+from statswindow import StatsWindowDetector
+from resetpipeline import ResetTransaction
+from mapclassifier import MapClassifier
+from pixelprobe import PixelProbes
+from playstate import PlayStateMachine, FARMING, WALKING
+from progression import ProgressionPlan
+from telemetry import Telemetry
+from spothealth import SpotMonitor
+from ocrcorpus import OCRCorpus
+from retrypolicy import RetryPolicies, RetryBudgetExceeded
+
+# Heavy modules load on first use, after the config has been validated
+pyautogui = lazy_import('pyautogui')
+pytesseract = lazy_import('pytesseract')
+screeninfo = lazy_import('screeninfo')
+ImageGrab = lazy_import('PIL.ImageGrab')
+keyboard = lazy_import('pynput.keyboard')
 
 class GameBot:
     """
     Un bot para automatizar acciones en un juego. Maneja movimientos, estadísticas y atributos del personaje.
     """
     def __init__(self):
-        self.setup_screen()
+        # Validate the config before probing monitors or hooking the keyboard
         self.setup_directories()
-        self.setup_keyboard_listener()
-        self.setup_logging()
         self.load_config('config.json')
+        self.setup_logging()
+        self.setup_screen()
+        self.setup_profiler()
+        self.setup_keyboard_listener()
+        self.setup_ocr()
+        self.setup_retry_policies()
+        self.layout = RoiLayout(self.config['ocr_coordinates'], self.config.get('layout'))
+        self.stats_window = StatsWindowDetector(self.layout)
+        self.probes = PixelProbes(self.layout, self.config.get('pixel_probes'))
+        map_settings = self.config.get('map_classifier', {})
+        self.maps = MapClassifier(map_settings.get('references_dir', os.path.join('images', 'maps')),
+                                  map_settings.get('max_distance', 10))
         self.initialize_game_state()
         pyautogui.FAILSAFE = False
+        self.input = InputDispatcher(self.config.get('input'))
+        self.chat = ChatChannel(self.input, self.frames, self.config.get('chat'))
+        self.conditions = ScreenConditions(self)
         self.running = True
+        # Set while run() is not inside a cycle; stop() waits on it before the final flush
+        self.loop_idle = threading.Event()
+        self.loop_idle.set()
+        self.wake = threading.Event()
         self.current_location = None
-        self.play = False
-        self.path_learner = PathLearner()
+        self.play_state = PlayStateMachine()
+        self.path_learner = PathLearner(self.config.get('obstacles'), **self.config.get('path_store', {}))
+        self.setup_path_recorder()
+        self.replay = PathReplayer(self, self.config.get('path_replay'))
+        self.progression = ProgressionPlan(self.config['level_thresholds'], self.path_learner)
+        self.path_learner.migrate_legacy({bracket['map']: [spot['location'] for spot in bracket['spots']]
+                                          for bracket in self.progression.brackets})
+        self.setup_telemetry()
+        self.spot_monitor = SpotMonitor(**self.config.get('spot_monitor', {}))
+        self.spot_monitor.apply_to(self.progression)
         self.record_good_path = False
         self.reference_point = None
+        self.current_map_cache = None
         self.first_time = True
+        checkpoint_settings = dict(self.config.get('checkpoint', {}))
+        self.checkpoint_enabled = checkpoint_settings.pop('enabled', True)
+        self.checkpoint = Checkpoint(**checkpoint_settings)
         self.load_game_state()
 
     def setup_directories(self):
@@ -53,16 +111,98 @@ class GameBot:
         except Exception as e:
             logging.error(f"Error loading game state: {e}")
 
+    def setup_profiler(self):
+        """Configura el profiler por ciclos (tecla configurable, F10 por defecto)"""
+        settings = dict(self.config.get('profiler', {}))
+        self.profiler_hotkey = settings.pop('hotkey', 'f10')
+        self.profiler = CycleProfiler(self.dirs['logs'], **settings)
+
     def setup_keyboard_listener(self):
-        """Configura un listener para detectar la tecla F9 que detiene el bot"""
+        """Configura un listener para las teclas F9 (detiene el bot) y la del profiler"""
+        profiler_key = getattr(keyboard.Key, self.profiler_hotkey, None) if self.profiler_hotkey else None
+
         def on_press(key):
             if key == keyboard.Key.f9:
                 logging.info("Bot stopped")
+                self.stop()
                 os._exit(0)  # Force exit the entire program
+            elif profiler_key is not None and key == profiler_key:
+                self.profiler.toggle()
 
         listener = keyboard.Listener(on_press=on_press)
         listener.start()
 
+    def stop(self, timeout=30):
+        """
+        Detiene el bucle principal desde otro hilo (F9): espera a que termine el ciclo en curso
+        para que el checkpoint no capture un estado a medio modificar, y después vacía todo.
+        """
+        self.running = False
+        self.wake.set()
+        if not self.loop_idle.wait(timeout):
+            logging.warning(f"Main loop did not stop within {timeout}s, flushing anyway")
+        self.shutdown()
+
+    def shutdown(self):
+        """Vacía la entrada pendiente, las rutas grabadas y el checkpoint antes de salir"""
+        self.running = False
+        for name, action in (('input', lambda: self.input.close()),
+                             ('path recorder', lambda: self.path_recorder.stop()),
+                             ('path store', lambda: self.path_learner.save_history()),
+                             ('telemetry', lambda: self.telemetry and self.telemetry.close()),
+                             ('checkpoint', lambda: self.checkpoint_enabled and self.checkpoint.save(self))):
+            try:
+                action()
+            except Exception as e:
+                logging.error(f"Error flushing {name} on shutdown: {e}")
+        # Last, so the records above reach the file
+        self.log_listener.stop()
+
+    def resume_from_checkpoint(self):
+        """
+        Reanuda desde el checkpoint si un frame lo confirma (mismo mapa y posición cercana).
+        Returns:
+            bool: True si se reanudó, False si hay que hacer el arranque en frío
+        """
+        if not self.checkpoint_enabled:
+            return False
+        data = self.checkpoint.load()
+        if not data:
+            return False
+        try:
+            self.checkpoint.restore(self, data)
+            if not self.checkpoint.verify(self, data):
+                self.layout.invalidate()
+                return False
+        except Exception as e:
+            logging.error(f"Error resuming from checkpoint: {e}")
+            self.layout.invalidate()
+            return False
+
+        movement = data.get('movement') or {}
+        spot = movement.get('spot') or data.get('spot')
+        if data.get('play') and self.play_state.at_spot((self.current_x, self.current_y), spot):
+            self.play_state.farming(movement.get('map') or data.get('map'), spot)
+        elif movement.get('state') in (WALKING, FARMING) and spot:
+            # Was on the way to (or farming at) the spot: the next cycle walks there again
+            self.play_state.walk_to(movement.get('map') or data.get('map'), spot)
+            self.play_state.interrupt('restart')
+        logging.info(f"Resumed from checkpoint on {data.get('map')} at ({self.current_x}, {self.current_y}), play={self.play}")
+        return True
+
+    @property
+    def play(self):
+        """True mientras la máquina de estados indica que se está farmeando"""
+        return self.play_state.state == FARMING
+
+    @play.setter
+    def play(self, value):
+        # Legacy assignments: False stops farming, True means farming at the current spot
+        if value:
+            self.play_state.farming(self.current_map_cache, (self.current_x, self.current_y))
+        else:
+            self.play_state.stop()
+
     def save_game_state(self):
         """Saves the current game state to path_history.json"""
         state_file = os.path.join(self.dirs['json'], 'path_history.json')
@@ -73,33 +213,30 @@ class GameBot:
             logging.error(f"Error saving game state: {e}")
 
     def setup_logging(self):
-        """Configura el sistema de logging y limpia logs anteriores"""
+        """Configura el logging en segundo plano (QueueHandler) con rotación por tamaño"""
         log_file = os.path.join(self.dirs['logs'], 'bot_debug.log')
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        
-        # Reset root logger
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
-        
-        # Configure file-only logging
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filename=log_file,
-            filemode='w'
-        )
+        self.log_listener = logpipeline.setup_logging(log_file, **self.config.get('logging', {}))
+        self.cycle_stats = CycleStats()
 
         # Suppress PIL and Tesseract debug logs
         logging.getLogger('PIL').setLevel(logging.WARNING)
         logging.getLogger('pytesseract').setLevel(logging.WARNING)
         
     def load_config(self, config_path: str):
-        """Carga la configuración del bot desde un archivo JSON"""
+        """
+        Carga la configuración del bot desde un archivo JSON y la valida.
+        Raises:
+            ValueError: Si la configuración no es válida
+        """
         config_file = os.path.join(self.dirs['json'], config_path)
         with open(config_file) as f:
             self.config = json.load(f)
+        errors = validate_config(self.config)
+        if errors:
+            # Logging is configured from this same file, so the errors go straight to stderr
+            for error in errors:
+                print(f"Config error: {error}", file=sys.stderr)
+            raise ValueError(f"Invalid {config_file}: " + '; '.join(errors))
 
     def initialize_game_state(self):
         """Inicializa las variables de estado del juego (nivel, resets, coordenadas)"""
@@ -117,19 +254,21 @@ class GameBot:
         self.screen_height = monitor.height
         logging.info(f"Screen size: {self.screen_width}x{self.screen_height}")
 
-    def get_position_data(self):
+    def get_position_data(self, frame=None):
         """
         Obtiene las coordenadas del juego mediante OCR.
+        Args:
+            frame: Frame ya capturado (por defecto el último frame compartido)
         Returns:
             str: Coordenadas en formato "x,y"
         """
         try:
-            adjusted_position = self.adjust_coordinates(self.config['ocr_coordinates']['position'])
-            coord_area = ImageGrab.grab(bbox=tuple(adjusted_position))
+            self.ensure_layout(need_elemental=False)
+            frame = frame or self.frames.latest()
+            coord_area = frame.crop(self.layout.roi('position'))
             coord_area_path = os.path.join(self.dirs['images'], 'coord_area_path.png')
             coord_area.save(coord_area_path)
-            config = r'--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789,'
-            return pytesseract.image_to_string(coord_area, config=config).strip()
+            return self._ocr_area(coord_area, 'position')
         except Exception as e:
             logging.error(f"Position fetch failed: {e}")
             raise ValueError("Position fetch failed")
@@ -184,7 +323,7 @@ class GameBot:
         return None
 
     # Update _fetch_position in GameBot class:
-    def _fetch_position(self):
+    def _fetch_position(self, frame=None):
         """
         Obtiene la posición actual del personaje.
         Returns:
@@ -192,7 +331,7 @@ class GameBot:
         Raises:
             ValueError: Si el formato de coordenadas es inválido
         """
-        raw_data = self.get_position_data()
+        raw_data = self.get_position_data(frame)
         if not self.is_valid_coordinate(raw_data):
             # Try processing as single string of digits
             coords = self.process_coordinates(raw_data)
@@ -201,24 +340,65 @@ class GameBot:
             raise ValueError(f"Invalid coordinate format: '{raw_data}'")
         return map(int, raw_data.split(','))
 
-    def get_current_position(self, retries=900, delay=1):
+    def get_current_position(self):
         """
-        Intenta obtener la posición actual con reintentos.
-        Args:
-            retries: Número máximo de intentos
-            delay: Tiempo entre intentos
+        Intenta obtener la posición actual según la política de reintentos 'position'.
         Returns:
             bool: True si tuvo éxito, False si no
         """
-        for attempt in range(retries):
+        try:
+            self.current_x, self.current_y = self.retry.run('position', lambda: tuple(self._fetch_position()))
+            self._publish_position(self.current_x, self.current_y)
+            return True
+        except RetryBudgetExceeded as e:
+            logging.warning(f"Failed to get current position: {e}")
+            return False
+
+    def setup_path_recorder(self):
+        """Crea el grabador de rutas en segundo plano y lo suscribe al flujo de posiciones"""
+        settings = dict(self.config.get('path_recorder', {}))
+        enabled = settings.pop('enabled', True)
+        self.position_listeners = []
+        self.path_recorder = PathRecorder(self.path_learner, **settings)
+        if enabled:
+            self.position_listeners.append(self.path_recorder.on_position)
+            self.path_recorder.start()
+
+    def _publish_position(self, x, y):
+        """
+        Notifica cada lectura de posición válida a los suscriptores.
+        Args:
+            x, y: Coordenadas leídas
+        """
+        for listener in self.position_listeners:
             try:
-                self.current_x, self.current_y = self._fetch_position()
-                return True
+                listener(x, y, self.current_map_cache)
             except Exception as e:
-                logging.warning(f"Attempt {attempt + 1} failed to get current position: {e}")
-                if attempt < retries - 1:
-                    time.sleep(delay)
-        return False
+                logging.error(f"Position listener error: {e}")
+
+    def setup_retry_policies(self):
+        """Configura las políticas de reintento por operación y sus acciones de recuperación"""
+        self.retry = RetryPolicies(self.config.get('retry_policies'))
+        self.retry.set_recovery('position', self.recover_position)
+        self.retry.set_recovery('stats', self.recover_stats)
+
+    def recover_position(self):
+        """Recuperación cuando la lectura de coordenadas falla repetidamente: /move al mapa actual"""
+        current_map = (self.get_game_state() or {}).get('current_map')
+        if not current_map or current_map == 'None':
+            current_map = 'lorencia'
+        logging.warning(f"Position unreadable, recovering with /move {current_map}")
+        self.move_to_location(f'/move {current_map}', avoid_checks=True)
+
+    def recover_stats(self):
+        """Recuperación cuando las estadísticas no se pueden leer: relocaliza la referencia o hace /move"""
+        logging.warning("Stats unreadable, re-locating elemental reference")
+        self.layout.invalidate(elemental_only=True)
+        self.stats_window.reset()
+        try:
+            self.ensure_layout()
+        except ValueError:
+            self.recover_position()
 
     def get_game_state(self):
         """Read current state from file with default values"""
@@ -257,42 +437,97 @@ class GameBot:
             logging.error(f"Error writing game state: {e}")
             return False
 
-    def _preprocess_image(self, img_path):
-        """Enhanced image preprocessing for better number recognition"""
-        img = cv2.imread(img_path)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Scale the image
-        scale = 2
-        scaled = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
-        
-        # Enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        contrast = clahe.apply(scaled)
-        
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(contrast)
-        
-        # Thresholding
-        _, binary = cv2.threshold(denoised, 127, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        return binary
+    def setup_ocr(self):
+        """Configura el motor OCR y la captura opcional de recortes para el corpus"""
+        self.ocr = OCREngine.from_config(self.config)
+        capture = self.config.get('corpus_capture', {})
+        self.corpus = OCRCorpus(max_per_field=capture.get('max_per_field', 500)) if capture.get('enabled') else None
+        self.corpus_sample_rate = capture.get('sample_rate', 0.1)
+
+        self.frames = FrameGrabber()
+        self.voting = {'frames': 3, 'frame_interval': 0.02, 'min_confidence': 0.5, 'fields': []}
+        self.voting.update(self.config.get('ocr_voting', {}))
+        self.ocr_pool = ThreadPoolExecutor(max_workers=max(1, self.voting['frames']), thread_name_prefix='ocr')
+
+    def _votes(self, field):
+        """True si el campo se lee votando sobre varios frames"""
+        fields = self.voting['fields']
+        if field in fields:
+            return True
+        return field in ('strenght', 'agility', 'vitality', 'energy', 'command') and 'attributes' in fields
 
-    def get_relative_coords(self, base_coords, ref_point):
+    def grab_vote_frames(self):
+        """Captura los frames consecutivos que comparten todas las lecturas votadas de un ciclo"""
+        return self.frames.grab_burst(self.voting['frames'], self.voting['frame_interval'])
+
+    def _read_voted(self, field, bbox, debug_path=None, frames=None, validate=None):
         """
-        Calcula coordenadas relativas a un punto de referencia.
+        Lee un campo numérico en varios frames consecutivos, con OCR en paralelo,
+        y acepta el valor mayoritario (o la mediana) con su confianza.
         Args:
-            base_coords: Coordenadas base
-            ref_point: Punto de referencia
+            field: Nombre del ROI
+            bbox: Coordenadas absolutas del recorte
+            debug_path: Ruta opcional donde guardar el primer recorte
+            frames: Frames ya capturados (si no, se captura una ráfaga)
+            validate: Función opcional value -> bool para descartar lecturas
         Returns:
-            list: Coordenadas ajustadas
+            tuple: (valor, confianza), (None, 0.0) si no hay lecturas válidas
+        """
+        if frames is None:
+            frames = self.grab_vote_frames() if self._votes(field) else [self.frames.grab()]
+        elif not self._votes(field):
+            frames = frames[:1]
+
+        crops = [frame.crop(bbox) for frame in frames]
+        if debug_path:
+            crops[0].save(debug_path)
+
+        texts = list(self.ocr_pool.map(lambda crop: self._ocr_area(crop, field), crops))
+        values = [self._extract_numeric_value(text) for text in texts]
+        valid = [value for value in values if validate is None or validate(value)]
+        value, confidence = vote(valid, total=len(values))
+
+        if len(values) > 1:
+            log_sampled(f'votes.{field}', f"{field} votes: {values} -> {value} (confidence {confidence:.2f})")
+        return value, confidence
+
+    def _ocr_area(self, area, field, backend=None):
+        """
+        Lee el texto de un recorte con el perfil y backend del campo.
+        Si la captura de corpus está activa, guarda una muestra del recorte
+        con la lectura como etiqueta sugerida.
+        Args:
+            area: Imagen PIL del recorte
+            field: Nombre del ROI (position, level, strenght...)
+            backend: Backend OCR opcional
+        Returns:
+            str: Texto reconocido
+        """
+        text = self.ocr.read(area, field, backend=backend)
+        if self.corpus and random.random() < self.corpus_sample_rate:
+            try:
+                self.corpus.add_crop(field, area, suggestion=text)
+            except Exception as e:
+                logging.error(f"Error capturing {field} crop: {e}")
+        return text
+
+    def ensure_layout(self, need_elemental=True):
         """
-        return [
-            base_coords[0] + ref_point[0],
-            base_coords[1] + ref_point[1],
-            base_coords[2] + ref_point[0],
-            base_coords[3] + ref_point[1]
-        ]
+        Construye la tabla de ROIs absolutos una sola vez: detecta la ventana del juego
+        y, si hace falta, localiza la referencia elemental.
+        Raises:
+            ValueError: Si la referencia elemental no se encuentra
+        """
+        if self.layout.window is None:
+            window_rect = detect_game_window(self.config.get('layout', {}).get('window_title'))
+            self.layout.set_window(window_rect)
+
+        if need_elemental and not self.layout.has_elemental:
+            ref_point = self.get_elemental_reference()
+            if not ref_point:
+                raise ValueError("Elemental reference not found")
+            self.reference_point = ref_point
+            self.layout.set_elemental(ref_point)
 
     def get_elemental_reference(self):
         """Localiza el punto de referencia elemental en la pantalla."""
@@ -303,17 +538,18 @@ class GameBot:
             logging.error(f"Reference image not found at: {image_path}")
             return None
             
-        for attempt in range(3):
-            time.sleep(1)
-            try:
-                elemental_loc = pyautogui.locateOnScreen(image_path, confidence=0.7)
-                if elemental_loc:
-                    logging.debug(f"Found elemental reference at: {elemental_loc}")
-                    return pyautogui.center(elemental_loc)
-                logging.warning(f"Attempt {attempt + 1}: Reference not found")
-            except Exception as e:
-                logging.error(f"Error finding elemental reference on attempt {attempt + 1}: {str(e)}")
-        return None
+        def locate():
+            elemental_loc = pyautogui.locateOnScreen(image_path, confidence=0.7)
+            if elemental_loc:
+                logging.debug(f"Found elemental reference at: {elemental_loc}")
+                return pyautogui.center(elemental_loc)
+            return None
+
+        try:
+            return self.retry.run('reference', locate, validate=lambda point: point is not None)
+        except RetryBudgetExceeded as e:
+            logging.error(f"Error finding elemental reference: {e}")
+            return None
 
         def get_toolbar_reference(self):
             """
@@ -336,15 +572,18 @@ class GameBot:
 
     def distribute_attributes(self):
         """Distribuye puntos de atributos disponibles según la configuración."""
-        ref_point = self.get_elemental_reference()
-        if not ref_point:
+        try:
+            self.ensure_layout()
+        except ValueError:
             logging.error("Cannot distribute attributes - reference point not found")
             return False
 
-        logging.info(f"Reference point found at: {ref_point}")
-
         # First read all stats
-        self.read_all_stats()
+        try:
+            self.read_all_stats()
+        except RetryBudgetExceeded as e:
+            logging.error(f"Cannot distribute attributes - stats unreadable: {e}")
+            return False
         current_state = self.get_game_state()
 
         # Log current state
@@ -381,6 +620,43 @@ class GameBot:
         logging.info(f"Starting distribution of {available_points} available points")
         logging.info(f"Stat distribution config: {self.config['stat_distribution']}")
 
+        if self.config.get('stat_commands', {}).get('enabled'):
+            self.add_points_with_commands(available_points)
+        else:
+            self.add_points_with_clicks(available_points)
+
+        # Read stats again after distribution
+        self.input.flush()
+        logging.info("Distribution complete, reading final stats")
+        try:
+            self.read_all_stats()
+        except RetryBudgetExceeded as e:
+            logging.error(f"Could not verify distribution: {e}")
+            return True
+        final_state = self.get_game_state()
+        logging.info("Final stats:")
+        logging.info(f"Available Points: {final_state['available_points']}")
+        logging.info(f"Strength: {final_state['current_strenght']}")
+        logging.info(f"Agility: {final_state['current_agility']}")
+        logging.info(f"Vitality: {final_state['current_vitality']}")
+        logging.info(f"Command: {final_state['current_command']}")
+        return True
+
+    def add_points_with_commands(self, available_points):
+        """Reparte los puntos enviando todos los comandos de stats (/addstr...) en un solo lote"""
+        commands = []
+        for stat, ratio in self.config['stat_distribution'].items():
+            stat_points = int(available_points * ratio)
+            command = self.config['stat_commands']['commands'].get(stat)
+            if stat_points > 0 and command:
+                commands.append(f"{command} {stat_points}")
+
+        if commands:
+            self.chat.send_batch(commands, confirm=self.conditions.available_points_changed(available_points))
+
+    def add_points_with_clicks(self, available_points):
+        """Reparte los puntos pulsando los botones +10/+100/+1000 del panel de stats"""
+        allocated = 0
         for stat, ratio in self.config['stat_distribution'].items():
             stat_points = int(available_points * ratio)
             if stat_points <= 0:
@@ -390,83 +666,71 @@ class GameBot:
             logging.info(f"Allocating {stat_points} points to {stat}")
 
             try:
-                stat_coords = self.config['ocr_coordinates']['attributes'][stat]
-                logging.info(f"Base coordinates for {stat}: {stat_coords}")
+                stat_coords = self.layout.table['attributes'][stat]
+                logging.info(f"Screen coordinates for {stat}: {stat_coords}")
+
+                if stat_coords.get('first_button'):
+                    first_coords = self.layout.center(stat_coords['first_button'])
+                    logging.info(f"Clicking first button at: {first_coords}")
+                    self.input.click(first_coords[0], first_coords[1], delay=0.5)
 
-                if 'first_button' in stat_coords:
-                    first_coords = self.get_relative_coords(stat_coords['first_button'], ref_point)
-                    logging.info(f"Clicking first button at relative coords: {first_coords}")
-                    pyautogui.click(first_coords[0], first_coords[1])
-                    time.sleep(0.5)
+                points_left = available_points - allocated
 
                 denominations = ['1000', '100', '10']
                 for denom in denominations:
-                    if denom in stat_coords:
+                    if stat_coords.get(denom):
                         denom_value = int(denom)
                         clicks = stat_points // denom_value
                         if clicks > 0:
-                            coords = self.get_relative_coords(stat_coords[denom], ref_point)
+                            coords = self.layout.center(stat_coords[denom])
                             logging.info(f"Will click {clicks} times on {denom} button at coords {coords}")
                             for click in range(clicks):
-                                logging.debug(f"Click {click + 1}/{clicks} for {denom} on {stat}")
-                                pyautogui.click(coords[0], coords[1])
-                                time.sleep(0.2)
+                                self.input.click(coords[0], coords[1])
+                            self.cycle_stats.count('clicks', clicks)
+                            # Continue as soon as the panel shows the points were spent
+                            self.input.flush()
+                            await_condition(self.conditions.available_points_changed(points_left), 1.0,
+                                            self.frames, description=f'{stat} +{denom} applied')
+                            points_left -= clicks * denom_value
+                            allocated += clicks * denom_value
                             stat_points %= denom_value
-                            time.sleep(0.5)
 
                     # Log remaining points after this denomination
                     logging.debug(f"Remaining points for {stat} after {denom}: {stat_points}")
 
                 # Hide plus info
-                if 'first_button' in stat_coords:
+                if stat_coords.get('first_button'):
                     logging.info(f"Hiding plus info for {stat}")
-                    pyautogui.click(first_coords[0], first_coords[1])
-                    time.sleep(0.5)
+                    self.input.click(first_coords[0], first_coords[1], delay=0.5)
 
             except Exception as e:
                 logging.error(f"Error distributing points for {stat}: {e}")
                 logging.error(f"Stat coordinates: {stat_coords}")
                 continue
 
-        # Read stats again after distribution
-        logging.info("Distribution complete, reading final stats")
-        self.read_all_stats()
-        final_state = self.get_game_state()
-        logging.info("Final stats:")
-        logging.info(f"Available Points: {final_state['available_points']}")
-        logging.info(f"Strength: {final_state['current_strenght']}")
-        logging.info(f"Agility: {final_state['current_agility']}")
-        logging.info(f"Vitality: {final_state['current_vitality']}")
-        logging.info(f"Command: {final_state['current_command']}")
-        return True
+    def read_attribute(self, attribute_name, frames=None):
+        """Read attribute with validation based on config settings, voting over consecutive frames"""
+        min_val, max_val = 0, float('inf')
+        if 'validation' in self.config and attribute_name in self.config['validation']:
+            min_val = self.config['validation'][attribute_name].get('min', 0)
+            max_val = self.config['validation'][attribute_name].get('max', float('inf'))
 
-    def read_attribute(self, attribute_name, ref_point):
-        """Read attribute with validation based on config settings"""
-        try:
-            attribute_coords = self.config['ocr_coordinates']['attributes'][attribute_name]['points']
-            relative_coords = self.get_relative_coords(attribute_coords, ref_point)
+        attribute_coords = self.layout.attribute(attribute_name, 'points')
+        if not attribute_coords:
+            logging.debug(f"No OCR coordinates configured for {attribute_name}")
+            return 0
 
-            attr_area = ImageGrab.grab(bbox=tuple(relative_coords))
+        try:
             attr_path = os.path.join(self.dirs['images'], f'{attribute_name}_value.png')
-            attr_area.save(attr_path)
-
-            preprocessed = self._preprocess_image(attr_path)
-            text = pytesseract.image_to_string(
-                preprocessed,
-                config='--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789'
+            value, confidence = self._read_voted(
+                attribute_name, attribute_coords, attr_path, frames,
+                validate=lambda value: min_val <= value <= max_val
             )
-
-            value = self._extract_numeric_value(text)
-
-            # Get validation rules from config
-            if 'validation' in self.config and attribute_name in self.config['validation']:
-                min_val = self.config['validation'][attribute_name].get('min', 0)
-                max_val = self.config['validation'][attribute_name].get('max', float('inf'))
-
-                if not min_val <= value <= max_val:
-                    logging.warning(f"{attribute_name} value out of range: {value}")
-                    return self.read_attribute(attribute_name, ref_point)
-
+            if value is None:
+                logging.warning(f"{attribute_name}: no reading within [{min_val}, {max_val}]")
+                return 0
+            if confidence < self.voting['min_confidence']:
+                logging.warning(f"{attribute_name}: low confidence read {value} ({confidence:.2f})")
             return value
 
         except Exception as e:
@@ -495,315 +759,449 @@ class GameBot:
         except ValueError:
             return 0
 
-    def read_available_points(self, ref_point):
+    def read_available_points(self):
         """Read available attribute points"""
         try:
-            coords = self.get_relative_coords(self.config['ocr_coordinates']['available_points'], ref_point)
-            points_area = ImageGrab.grab(bbox=tuple(coords))
+            self.ensure_layout()
+            points_area = self.frames.latest().crop(self.layout.roi('available_points'))
             points_path = os.path.join(self.dirs['images'], 'available_points.png')
             points_area.save(points_path)
 
-            points_thresh = self._preprocess_image(points_path)
-            if points_thresh is not None:
-                points_text = pytesseract.image_to_string(
-                    Image.fromarray(points_thresh),
-                    config=r'--oem 3 --psm 13 -c tessedit_char_whitelist=0123456789'
-                )
-                return self._extract_numeric_value(points_text)
+            points_text = self._ocr_area(points_area, 'available_points', backend='tesseract_raw_line')
+            return self._extract_numeric_value(points_text)
         except Exception as e:
             logging.error(f"Error reading available points: {e}")
         return 0
 
     def read_all_stats(self):
-        """Read and save all character stats"""
-        try:
-            self.ensure_stats_window_open()
-            
-            ref_point = self.get_elemental_reference()
-            if not ref_point:
-                return self.read_all_stats()
+        """
+        Read and save all character stats.
+        Retries are bounded by the 'stats' policy; when its budget is exhausted
+        RetryBudgetExceeded propagates to the main loop as a consecutive error.
+        """
+        return self.retry.run('stats', self._read_all_stats_once)
 
-            level = self._read_numeric_area('level', ref_point)
-            reset = self._read_numeric_area('reset', ref_point)
+    def _read_all_stats_once(self):
+        """Single attempt of read_all_stats"""
+        self.ensure_stats_window_open()
 
-            strenght = self.read_attribute('strenght', ref_point)
-            agility = self.read_attribute('agility', ref_point)
-            vitality = self.read_attribute('vitality', ref_point)
-            energy = self.read_attribute('energy', ref_point)
-            command = self.read_attribute('command', ref_point)
+        self.ensure_layout()
 
-            available_coords = self.config['ocr_coordinates']['available_points']
-            points_coords = self.get_relative_coords(available_coords, ref_point)
-            points_area = ImageGrab.grab(bbox=tuple(points_coords))
-            points_path = os.path.join(self.dirs['images'], 'available_points.png')
-            points_area.save(points_path)
+        # All fields are cropped from the same burst of frames
+        frames = self.grab_vote_frames()
 
-            preprocessed = self._preprocess_image(points_path)
-            points_text = pytesseract.image_to_string(
-                preprocessed,
-                config='--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789'
-            )
-            available_points = self._extract_numeric_value(points_text)
-
-            state = {
-                'current_level': level,
-                'current_reset': reset,
-                'current_strenght': strenght,
-                'current_agility': agility,
-                'current_vitality': vitality,
-                'current_energy': energy,
-                'current_command': command,
-                'available_points': available_points
-            }
+        level = self._read_numeric_area('level', frames)
+        reset = self._read_numeric_area('reset', frames)
 
-            self.update_game_state(state)
+        strenght = self.read_attribute('strenght', frames)
+        agility = self.read_attribute('agility', frames)
+        vitality = self.read_attribute('vitality', frames)
+        energy = self.read_attribute('energy', frames)
+        command = self.read_attribute('command', frames)
 
-            logging.info(f"======== RESET: {reset} ========")
-            logging.info(f"======== LEVEL: {level} ========")
-            logging.info(f"======== STATS: STR:{strenght} AGI:{agility} VIT:{vitality} ENE:{energy} CMD:{command} ========")
-            logging.info(f"======== AVAILABLE POINTS: {available_points} ========")
+        available_points = self._read_numeric_area('available_points', frames)
 
-            return level, reset
+        state = {
+            'current_level': level,
+            'current_reset': reset,
+            'current_strenght': strenght,
+            'current_agility': agility,
+            'current_vitality': vitality,
+            'current_energy': energy,
+            'current_command': command,
+            'available_points': available_points
+        }
 
-        except Exception as e:
-            logging.error(f"Error reading stats: {e}")
-            return self.read_all_stats()
+        self.update_game_state(state)
 
-    def _read_numeric_area(self, area_name, ref_point):
-        """Read numeric value from specified area"""
-        coords = self.get_relative_coords(self.config['ocr_coordinates'][area_name], ref_point)
-        area = ImageGrab.grab(bbox=tuple(coords))
-        path = os.path.join(self.dirs['images'], f'{area_name}_test.png')
-        area.save(path)
+        logging.info(f"======== RESET: {reset} ========")
+        logging.info(f"======== LEVEL: {level} ========")
+        logging.info(f"======== STATS: STR:{strenght} AGI:{agility} VIT:{vitality} ENE:{energy} CMD:{command} ========")
+        logging.info(f"======== AVAILABLE POINTS: {available_points} ========")
 
-        preprocessed = self._preprocess_image(path)
-        text = pytesseract.image_to_string(
-            preprocessed,
-            config='--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789'
-        )
-        return self._extract_numeric_value(text)
+        return level, reset
 
-    def adjust_coordinates(self, coordinates):
+    def _read_numeric_area(self, area_name, frames=None):
         """
-        Ajusta coordenadas basadas en punto de referencia.
-        Args:
-            coordinates: Coordenadas a ajustar
-        Returns:
-            list: Coordenadas ajustadas
+        Read numeric value from specified area.
+        Raises:
+            ValueError: If the voted value is below the configured confidence
         """
+        coords = self.layout.roi(area_name)
+        path = os.path.join(self.dirs['images'], f'{area_name}_test.png')
+        if area_name == 'available_points':
+            path = os.path.join(self.dirs['images'], 'available_points.png')
 
-        if not self.reference_point:
-            return coordinates
+        value, confidence = self._read_voted(area_name, coords, path, frames)
+        if confidence < self.voting['min_confidence']:
+            raise ValueError(f"{area_name}: low confidence read {value} ({confidence:.2f})")
+        return value
 
-        try:
-            # Your config uses absolute coordinates, so we'll adjust based on the reference point directly
-            offset_x = self.reference_point[0] - coordinates[0]
-            offset_y = self.reference_point[1] - coordinates[1]
+    def ensure_stats_window_open(self):
+        """Abre la ventana de stats solo si el detector la ve cerrada"""
+        return self.set_stats_window(True)
 
-            adjusted_coordinates = [
-                coordinates[0] + offset_x,
-                coordinates[1] + offset_y,
-                coordinates[2] + offset_x,
-                coordinates[3] + offset_y
-            ]
+    def ensure_stats_window_closed(self):
+        """Cierra la ventana de stats solo si el detector la ve abierta"""
+        return self.set_stats_window(False)
 
-            logging.debug(f"Original coordinates: {coordinates}")
-            logging.debug(f"Adjusted coordinates: {adjusted_coordinates}")
-            return adjusted_coordinates
+    def set_stats_window(self, visible):
+        """
+        Lleva la ventana de stats al estado pedido. 'c' alterna la ventana,
+        así que solo se pulsa cuando el detector indica el estado contrario.
+        Returns:
+            bool: True si la ventana quedó en el estado pedido
+        """
+        try:
+            if self.stats_window.is_open(self.frames.latest()) == visible:
+                return True
+            self.input.press('c', wait=True)
+            state = 'visible' if visible else 'closed'
+            return await_condition(self.conditions.stats_window_visible(visible), 1.0, self.frames,
+                                   description=f'stats window {state}')
+        except Exception as e:
+            logging.error(f"Error toggling stats window: {e}")
+            return False
 
+    def probe(self, name, frame=None):
+        """
+        Lee una sonda de píxeles (ver PixelProbes) sobre el frame compartido.
+        Returns:
+            bool | float: Valor de la sonda, o None si no está configurada
+        """
+        try:
+            self.ensure_layout(need_elemental=False)
+            return self.probes.get(frame or self.frames.latest(), name)
         except Exception as e:
-            logging.error(f"Error adjusting coordinates: {e}")
-            return coordinates
+            logging.debug(f"Probe {name} failed: {e}")
+            return None
 
-    def ensure_stats_window_open(self):
-        """Ensures the stats window stays open without image detection"""
+    def identify_map(self, frame=None):
+        """
+        Identifica el mapa actual desde el HUD del frame compartido y actualiza el estado.
+        Returns:
+            str: Nombre del mapa (como en /move) o None si no se reconoce
+        """
         try:
-            pyautogui.press('c')
-            time.sleep(0.1)
+            self.ensure_layout(need_elemental=False)
+            # Maps sharing a HUD name are resolved with the map of the last /move
+            name, _ = self.maps.classify(frame or self.frames.latest(), self.layout.roi('map_name'),
+                                         expected=self.current_map_cache)
         except Exception as e:
-            logging.error(f"Error pressing C key: {e}")
+            logging.debug(f"Map identification failed: {e}")
+            return None
+        if name and name != self.current_map_cache:
+            self.current_map_cache = name
+            self.update_game_state({'current_map': name})
+        return name
 
     def move_to_location(self, command: str, avoid_checks=False):
         """Modified to keep stats window consistently open"""
         if not avoid_checks:
             location = command.replace('/move ', '')
             current_state = self.get_game_state()
+            # The screen is the source of truth; the state file is only a fallback
+            current_map = self.identify_map() or current_state['current_map']
 
-            if location != current_state['current_map']:
+            if location != current_map:
                 self.distribute_attributes()
                 if current_state['current_level'] >= self.config['reset_level']:
                     time.sleep(0.1)
 
-                self.play = False
-                pyautogui.press('enter')
-                pyautogui.write(command)
-                pyautogui.press('enter')
-                time.sleep(0.5)
-                pyautogui.press('c')  # Reopen stats after command
-
+                self.send_move_command(command)
                 self.update_game_state({'current_map': location})
         else:
-            self.play = False
-            pyautogui.press('enter')
-            pyautogui.write(command)
-            pyautogui.press('enter')
-            time.sleep(0.5)
-            pyautogui.press('c')
+            self.send_move_command(command)
+
+    def send_move_command(self, command):
+        """
+        Envía un /move por el chat y espera a que cambien las coordenadas del HUD.
+        Returns:
+            bool: True si el teletransporte se confirmó
+        """
+        if self.play:
+            self.play_state.interrupt('/move')
+        self.path_recorder.mark_stop('move')
+        location = command.replace('/move ', '')
+        frame = self.frames.grab()
+        # A /move within the current map already satisfies map_is, wait for the teleport instead
+        if self.maps.distinct(location) and self.identify_map(frame) != location:
+            confirm = self.conditions.map_is(location)
+        elif not self.maps.distinct(location) and self.current_map_cache != location:
+            # No reference of its own (unknown, or sharing its HUD name with another map):
+            # a teleport to another map is a large jump
+            confirm = self.conditions.map_changed(self.read_position_on(frame))
+        else:
+            confirm = self.conditions.coordinates_changed(self.read_position_on(frame))
+        confirmed = self.chat.send(command, confirm=confirm)
+        if confirmed:
+            self.current_map_cache = location
+
+        if confirmed and not self.maps.knows(location):
+            try:
+                self.maps.learn(self.frames.grab(), self.layout.roi('map_name'), location)
+            except Exception as e:
+                logging.error(f"Error learning map reference for {location}: {e}")
+        self.ensure_stats_window_open()
+        return confirmed
+
+    def read_position_on(self, frame=None):
+        """Lectura única de coordenadas, sin reintentos. Devuelve (x, y) o None"""
+        try:
+            position = tuple(self._fetch_position(frame))
+        except Exception:
+            return None
+        self._publish_position(*position)
+        return position
+
+    def read_field_on(self, frame, field):
+        """Lectura única de un campo numérico del panel de stats sobre un frame"""
+        value, _ = self._read_voted(field, self.layout.roi(field), frames=[frame or self.frames.grab()])
+        return value
+
+    def step_towards(self, dx, dy, tolerance=10):
+        """
+        Un paso del controlador de movimiento hacia un desplazamiento (dx, dy).
+        Args:
+            dx, dy: Distancia al objetivo
+            tolerance: Distancia euclídea a partir de la cual se camina (la misma que usa
+                       PathReplayer para dar un waypoint por alcanzado). Solo se pulsa la
+                       flecha de un eje cuando su distancia supera tolerance / 2, para no
+                       zigzaguear sobre un eje ya alineado.
+        Returns:
+            bool: True si se envió alguna tecla
+        """
+        if math.hypot(dx, dy) <= tolerance:
+            return False
+        deadband = tolerance / 2
+        moved = False
+        if abs(dx) > deadband:
+            self.input.tap('left' if dx < 0 else 'right', coalesce=True)
+            moved = True
+        if abs(dy) > deadband:
+            self.input.tap('down' if dy < 0 else 'up', coalesce=True)
+            moved = True
+        if moved:
+            self.cycle_stats.count('steps')
+            time.sleep(0.05)
+        return moved
 
     def move_to_coordinates(self, target_x: int, target_y: int):
         """Movement without stats window toggling"""
+        # Follow a stored good path when there is one; the greedy loop below finishes the approach
+        self.replay.follow(target_x, target_y)
+
         if not self.get_current_position():
             logging.error("Failed to get initial position")
             return
 
         last_pos = {'x': self.current_x, 'y': self.current_y}
         stuck_count = 0
-        move_delay = 0.05
 
-        while True:
+        while self.running:
             if not self.get_current_position():
-                self.move_to_location(f'/move {self.current_location}')
-                continue
+                # The 'position' circuit breaker already escalates to /move
+                logging.error("Lost position while moving")
+                return
 
             dx = target_x - self.current_x
             dy = target_y - self.current_y
+
+            # Do not push an axis into a known obstacle while the other axis can still progress
+            obstacles = self.path_learner.obstacles
+            step_x = self.current_x + (1 if dx > 0 else -1)
+            step_y = self.current_y + (1 if dy > 0 else -1)
+            if abs(dy) > 10 and obstacles.blocked(self.current_map_cache, step_x, self.current_y):
+                dx = 0
+            elif abs(dx) > 10 and obstacles.blocked(self.current_map_cache, self.current_x, step_y):
+                dy = 0
             
             position_change = abs(self.current_x - last_pos['x']) + abs(self.current_y - last_pos['y'])
             if position_change < 5:
                 stuck_count += 1
                 if stuck_count >= 3:
+                    obstacles.add_stuck(self.current_map_cache, self.current_x, self.current_y)
+                    self.path_recorder.mark_stop('stuck', success=False, target=(target_x, target_y))
                     self.move_to_location(f'/move {self.current_location}')
                     stuck_count = 0
                     continue
             else:
                 stuck_count = 0
 
-            if abs(dx) > 10 or abs(dy) > 10:
-                if abs(dx) > 10:
-                    key = 'left' if dx < 0 else 'right'
-                    pyautogui.keyDown(key)
-                    pyautogui.keyUp(key)
-                
-                if abs(dy) > 10:
-                    key = 'down' if dy < 0 else 'up'
-                    pyautogui.keyDown(key)
-                    pyautogui.keyUp(key)
-
-                time.sleep(move_delay)
-            else:
+            if not self.step_towards(dx, dy):
                 self.check_and_click_play(target_x, target_y)
                 break
 
             last_pos = {'x': self.current_x, 'y': self.current_y}
 
     def check_and_click_play(self, x, y):
-        """Check play button and update location state"""
+        """Pulsa play en el punto si el botón está apagado y confirma por sus píxeles que se activó"""
         try:
-            current_state = self.get_game_state()
-            play_coords = self.config['ocr_coordinates']['play']
-            play_button_area = ImageGrab.grab(bbox=tuple(play_coords))
-            play_path = os.path.join(self.dirs['images'], 'play_button_area.png')
-            play_button_area.save(play_path)
-
-            if abs(self.current_x - x) <= 10 and abs(self.current_y - y) <= 10 and not self.play:
-                pyautogui.click(play_coords[0] + 5, play_coords[1] + 3)
-                self.play = True
+            self.ensure_layout(need_elemental=False)
+            play_coords = self.layout.roi('play')
+            play_active = self.probe('play_active')
+            if not self.play_state.at_spot((self.current_x, self.current_y), (x, y)):
+                return
+
+            # Without a play_active probe, fall back to the in-memory state
+            if play_active if play_active is not None else self.play:
+                self.play_state.farming(self.current_map_cache, (x, y))
+                logging.info("Play already active (red) - skipping click")
+                return
+
+            play_x, play_y = self.layout.center(play_coords)
+            self.input.click(play_x, play_y, wait=True)
+            confirmed = await_condition(lambda frame: self.probe('play_active', frame) is not False, 1.0,
+                                        self.frames, description='play active')
+            if confirmed:
+                self.play_state.farming(self.current_map_cache, (x, y))
+                self.path_recorder.mark_stop('play')
                 self.update_game_state({'current_location': [x, y]})
                 logging.info("Play button clicked - was inactive (green)")
-            elif self.play:
-                logging.info("Play already active (red) - skipping click")
+            else:
+                self.play_state.interrupt('play click not confirmed')
 
         except Exception as e:
             logging.error(f"Error checking play button: {e}")
 
-    def reset_character(self):
-        """Reset character and manage stats window"""
-        pyautogui.press('c')  # Close stats window before reset
-        time.sleep(0.5)
-        pyautogui.press('enter')
-        pyautogui.write('/reset')
-        pyautogui.press('enter')
-        time.sleep(2)
-        pyautogui.press('c')  # Reopen stats window after reset
+    def setup_telemetry(self):
+        """Abre el almacén de telemetría y aplica los ritmos de nivel medidos al plan de progresión"""
+        settings = dict(self.config.get('telemetry', {}))
+        enabled = settings.pop('enabled', True)
+        self.telemetry_apply_every = settings.pop('apply_every', 20)
+        self.telemetry_cycles = 0
+        self.telemetry = Telemetry(**settings) if enabled else None
+        if self.telemetry:
+            self.telemetry.apply_to(self.progression)
+
+    def record_telemetry(self, level, resets, target):
+        """Guarda una muestra mientras se farmea en el punto y recalcula el plan cada N ciclos"""
+        if not self.telemetry or not target or self.play_state.state != FARMING:
+            return
+        self.telemetry.record(level, resets, self.play_state.map, self.play_state.spot, target['level'])
+        self.telemetry_cycles += 1
+        if self.telemetry_cycles % self.telemetry_apply_every == 0:
+            self.telemetry.apply_to(self.progression)
 
-        current_state = self.get_game_state()
-        new_reset = current_state['current_reset'] + 1
-        self.update_game_state({
-            'current_reset': new_reset,
-            'current_level': 0
-        })
-        self.distribute_attributes()
+    def check_crowded_spot(self, level):
+        """
+        Comprueba si el punto donde se farmea está ocupado (nivel estancado o jugadores cerca)
+        y, si lo está, lo marca ocupado en el plan para cambiar a otro punto del tramo.
+        Returns:
+            bool: True si hay que cambiar de punto
+        """
+        if self.play_state.state != FARMING:
+            return False
+        map_name, spot = self.play_state.map, self.play_state.spot
+        reason = self.spot_monitor.check(map_name, spot, level, self.probe('players_nearby'),
+                                         self.progression.xp_rate(map_name, spot), visit=self.play_state.since)
+        if not reason:
+            return False
+        logging.warning(f"Spot {map_name} {spot} is crowded ({reason}), failing over")
+        self.progression.mark_occupied(map_name, spot, self.spot_monitor.cooldown)
+        self.progression.set_busy_ratio(map_name, spot, self.spot_monitor.busy_ratio(map_name, spot))
+        self.play_state.interrupt('crowded spot')
+        self.cycle_stats.count('failovers')
+        return True
+
+    def update_play_state(self, frame=None):
+        """Actualiza la máquina de estados de play con un solo frame (botón, posición y mapa)"""
+        frame = frame or self.frames.grab()
+        self.play_state.observe(self.probe('play_active', frame), self.read_position_on(frame),
+                                self.identify_map(frame))
+
+    def go_farm(self, target):
+        """Va al mapa y punto de `target` (entrada de level_thresholds) y activa play"""
+        x, y = target['location']
+        self.play_state.walk_to(target['map'], (x, y))
+        self.move_to_location(target['command'])
+        self.move_to_coordinates(x, y)
+        self.check_and_click_play(x, y)
+
+    def target_for_level(self, level):
+        """
+        Devuelve el mejor punto libre del tramo de nivel que corresponde (ver ProgressionPlan).
+        Returns:
+            dict: {'command', 'map', 'location', 'level'} o None
+        """
+        return self.progression.target_for(level)
+
+    def reset_character(self):
+        """Resetea el personaje y vuelve a farmear en una sola transacción (ver ResetTransaction)"""
+        return ResetTransaction(self).run()
 
     def run(self):
         """Ejecuta el bucle principal del bot"""
+        self.loop_idle.clear()
+        try:
+            self._run_loop()
+        finally:
+            self.loop_idle.set()
+
+    def _run_loop(self):
         while self.running:
+            self.profiler.start_cycle()
             try:
                 if not self.running:
                     return
 
-                pyautogui.click(self.screen_width // 2, self.screen_height // 2)
+                self.input.click(self.screen_width // 2, self.screen_height // 2, wait=True)
 
                 # Primera inicialización
                 if self.first_time:
-                    logging.info("1. Move to lorencia first")
-                    self.move_to_location('/move lorencia')
                     self.first_time = False
+                    if not self.resume_from_checkpoint():
+                        logging.info("1. Move to lorencia first")
+                        self.move_to_location('/move lorencia')
 
                 # Manejo de errores consecutivos
                 if self.consecutive_errors > self.config['error_threshold']:
                     logging.error("Many consecutives errors")
                     self.play = False  # Reset play state
                     self.move_to_location('/move lorencia')
-                    time.sleep(5)
                     self.consecutive_errors = 0
 
                 level, resets = self.read_all_stats()
 
+                hp = self.probe('hp_bar')
+                if hp is not None and hp <= self.config['pixel_probes']['hp_bar'].get('dead_below', 0.02):
+                    logging.warning(f"HP bar empty ({hp:.0%}), character is probably dead")
+                    self.play = False
+
                 # Resetear si alcanza el nivel configurado
                 if level >= self.config['reset_level'] <= self.config['max_level']:
                     self.play = False  # Reset play state
+                    # Reset, distribution, /move and walk back to the spot in one transaction
                     self.reset_character()
-                    # Después del reset, ejecutar el flujo normal una vez
-                    if level < self.config['max_level']:
-                        for threshold, obj in sorted(self.config['level_thresholds'].items(), key=lambda x: int(x[0]), reverse=True):
-                            if level >= int(threshold):
-                                self.move_to_location(obj["command"])
-                                x = obj["location"][0]
-                                y = obj["location"][1]
-                                self.move_to_coordinates(x,y)
-                                self.check_and_click_play(x,y)
-                                break
-
-                # Si no está jugando, ejecutar el flujo normal
-                elif not self.play and level < self.config['max_level']:
-                    for threshold, obj in sorted(self.config['level_thresholds'].items(), key=lambda x: int(x[0]), reverse=True):
-                        if level >= int(threshold):
-                            self.move_to_location(obj["command"])
-                            x = obj["location"][0]
-                            y = obj["location"][1]
-                            self.move_to_coordinates(x,y)
-                            self.check_and_click_play(x,y)
-                            break
-                elif self.play:
-                    for threshold, obj in sorted(self.config['level_thresholds'].items(), key=lambda x: int(x[0]), reverse=True):
-                        if level >= int(threshold):
-                            self.move_to_location(obj["command"])
-                            x = obj["location"][0]
-                            y = obj["location"][1]
-                            self.move_to_coordinates(x,y)
-                            self.check_and_click_play(x,y)
-                            break
+
+                # Ir a farmear solo si no se está farmeando ya en el punto que toca
+                else:
+                    self.update_play_state()
+                    self.check_crowded_spot(level)
+                    target = self.target_for_level(level)
+                    if target and self.play_state.needs_walk(target['map'], target['location']):
+                        self.go_farm(target)
+                    elif target:
+                        self.cycle_stats.count('walks_skipped')
+                    self.record_telemetry(level, resets, target)
 
                 self.consecutive_errors = 0
-                time.sleep(self.config['check_interval'])
+                if self.checkpoint_enabled:
+                    self.checkpoint.save(self)
+                self.cycle_stats.emit(level=level, resets=resets, play=self.play_state.state, map=self.current_map_cache,
+                                      input_latency=self.input.stats())
+                self.profiler.end_cycle()
+                self.wake.wait(self.config['check_interval'])
 
             except KeyboardInterrupt:
                 logging.info("Bot stopped by user")
+                self.shutdown()
                 break
             except Exception as e:
                 self.consecutive_errors += 1
                 logging.error(f"Error in main loop: {e}")
-                time.sleep(1)
+                self.profiler.end_cycle()
+                self.wake.wait(1)
 
 if __name__ == "__main__":
     bot = GameBot()
@@ -0,0 +1,216 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from lazyimport import lazy_import
+
+pyautogui = lazy_import('pyautogui')
+
+ACTIONS = ('press', 'key_down', 'key_up', 'tap', 'click', 'write', 'hotkey')
+
+
+class InputTicket:
+    """Handle for a queued action; wait() blocks until it has been sent and its delay has elapsed"""
+    def __init__(self, action, args, delay, coalesce):
+        self.action = action
+        self.args = args
+        self.delay = delay
+        self.coalesce = coalesce
+        self.submitted = time.perf_counter()
+        self.sent = None
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def finish(self, sent, error=None):
+        self.sent = sent
+        self.error = error
+        self._done.set()
+
+
+class InputDispatcher:
+    """
+    Sends keyboard and mouse input from its own worker thread.
+
+    pyautogui.PAUSE is disabled; every action gets its own explicit delay
+    (config['input']['delays']) and a minimum spacing between actions of
+    the same kind only where the game needs it (config['input']['min_interval']).
+    A tap holds its key for tap_hold seconds so the game registers the movement.
+    Redundant key events are coalesced: key_down of a held key, key_up of a
+    released key, and a tap identical to the one still waiting at the end of
+    the queue are dropped. Submit-to-sent latency is recorded per action.
+    """
+    def __init__(self, settings=None):
+        settings = settings or {}
+        pyautogui.PAUSE = 0
+        self.delays = {action: 0.0 for action in ACTIONS}
+        self.delays.update(settings.get('delays', {}))
+        self.min_interval = settings.get('min_interval', {})
+        self.write_interval = settings.get('write_interval', 0.0)
+        self.tap_hold = settings.get('tap_hold', 0.1)
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._held = set()
+        self._last_sent = {}
+        self._pending = 0
+        self.latencies = {action: deque(maxlen=500) for action in ACTIONS}
+        self.coalesced = 0
+        self.running = True
+
+        self._worker = threading.Thread(target=self._run, name='input-dispatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, action, *args, delay=None, coalesce=False, wait=False):
+        """
+        Queues an action.
+        Args:
+            action: One of ACTIONS
+            args: Arguments of the pyautogui call
+            delay: Pause after the action (defaults to delays[action])
+            coalesce: Drop it if the same action is already waiting at the end of the queue
+            wait: Block until the action has been sent
+        Returns:
+            InputTicket
+        """
+        ticket = InputTicket(action, args, self.delays[action] if delay is None else delay, coalesce)
+        with self._cond:
+            if not self.running:
+                # Nothing will send it any more; never leave a waiter blocked
+                logging.warning(f"Input {action}{args} dropped: dispatcher closed")
+                ticket.finish(None, RuntimeError('input dispatcher closed'))
+                return ticket
+            last = self._queue[-1] if self._queue else None
+            if coalesce and last and last.action == action and last.args == args:
+                self.coalesced += 1
+                ticket = last
+            else:
+                self._queue.append(ticket)
+                self._pending += 1
+                self._cond.notify()
+        if wait:
+            ticket.wait()
+        return ticket
+
+    def press(self, key, **kwargs):
+        return self.submit('press', key, **kwargs)
+
+    def key_down(self, key, **kwargs):
+        return self.submit('key_down', key, **kwargs)
+
+    def key_up(self, key, **kwargs):
+        return self.submit('key_up', key, **kwargs)
+
+    def tap(self, key, **kwargs):
+        """key_down, hold for tap_hold seconds, key_up, sent as one action"""
+        return self.submit('tap', key, **kwargs)
+
+    def click(self, x, y, **kwargs):
+        return self.submit('click', int(x), int(y), **kwargs)
+
+    def write(self, text, **kwargs):
+        return self.submit('write', text, **kwargs)
+
+    def hotkey(self, *keys, **kwargs):
+        return self.submit('hotkey', *keys, **kwargs)
+
+    def flush(self, timeout=None):
+        """Blocks until every queued action has been sent"""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        self.flush(timeout=5)
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def _send(self, ticket):
+        action, args = ticket.action, ticket.args
+        if action == 'key_down':
+            if args[0] in self._held:
+                self.coalesced += 1
+                return
+            pyautogui.keyDown(args[0])
+            self._held.add(args[0])
+        elif action == 'key_up':
+            if args[0] not in self._held:
+                self.coalesced += 1
+                return
+            pyautogui.keyUp(args[0])
+            self._held.discard(args[0])
+        elif action == 'tap':
+            pyautogui.keyDown(args[0])
+            time.sleep(self.tap_hold)
+            pyautogui.keyUp(args[0])
+            self._held.discard(args[0])
+        elif action == 'press':
+            pyautogui.press(args[0])
+        elif action == 'click':
+            pyautogui.click(args[0], args[1])
+        elif action == 'write':
+            pyautogui.write(args[0], interval=self.write_interval)
+        elif action == 'hotkey':
+            pyautogui.hotkey(*args)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait()
+                if not self.running:
+                    while self._queue:
+                        self._queue.popleft().finish(None, RuntimeError('input dispatcher closed'))
+                    self._pending = 0
+                    self._cond.notify_all()
+                    return
+                ticket = self._queue.popleft()
+
+            spacing = self.min_interval.get(ticket.action, 0)
+            if spacing:
+                elapsed = time.perf_counter() - self._last_sent.get(ticket.action, 0)
+                if elapsed < spacing:
+                    time.sleep(spacing - elapsed)
+
+            error = None
+            try:
+                self._send(ticket)
+            except Exception as e:
+                error = e
+                logging.error(f"Input {ticket.action}{ticket.args} failed: {e}")
+
+            sent = time.perf_counter()
+            self._last_sent[ticket.action] = sent
+            with self._cond:
+                self.latencies[ticket.action].append(sent - ticket.submitted)
+            if ticket.delay:
+                time.sleep(ticket.delay)
+            ticket.finish(sent, error)
+
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def stats(self):
+        """Returns {action: {'count', 'mean_ms', 'p95_ms'}} for the recorded input latencies"""
+        # The worker appends to the deques; copy them under the lock before sorting
+        with self._cond:
+            snapshot = {action: list(samples) for action, samples in self.latencies.items() if samples}
+        result = {}
+        for action, samples in snapshot.items():
+            ordered = sorted(samples)
+            result[action] = {
+                'count': len(ordered),
+                'mean_ms': sum(ordered) * 1000 / len(ordered),
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+            }
+        return result
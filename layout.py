@@ -0,0 +1,157 @@
+import logging
+
+ATTRIBUTES = ('strenght', 'agility', 'vitality', 'energy', 'command')
+
+# ROIs measured in absolute screen coordinates; everything else in
+# config['ocr_coordinates'] is an offset from the elemental reference.
+WINDOW_ANCHORED = ('position', 'play', 'map_name')
+
+
+def detect_game_window(title):
+    """
+    Finds the game window rectangle by title.
+    Returns:
+        tuple: (left, top, width, height) or None if not found
+    """
+    if not title:
+        return None
+    try:
+        import pygetwindow
+        for window in pygetwindow.getWindowsWithTitle(title):
+            if window.width > 0 and window.height > 0:
+                return window.left, window.top, window.width, window.height
+    except Exception as e:
+        logging.warning(f"Game window detection failed: {e}")
+    return None
+
+
+class RoiLayout:
+    """
+    Absolute ROI table computed once from the game window rectangle.
+
+    Window-anchored ROIs (position, play, map_name) are relative to the
+    window origin; the stats fields are relative to the elemental reference,
+    whose offset inside the window is found once. Every offset is measured at
+    layout.base_resolution and scaled to the detected window size.
+    The per-frame path only does table lookups.
+    """
+    def __init__(self, ocr_coordinates, settings=None):
+        self.ocr_coordinates = ocr_coordinates
+        settings = settings or {}
+        self.base_resolution = settings.get('base_resolution', [1920, 1080])
+        self.anchors = settings.get('anchors', {})
+        self.configured_elemental = settings.get('elemental_offset')
+        self.window = None
+        self.elemental_offset = None
+        self.scale = (1.0, 1.0)
+        self.table = {}
+        # Bumped whenever the table changes, so caches built on it can tell
+        self.version = 0
+
+    def anchor_for(self, name):
+        return self.anchors.get(name, 'window' if name in WINDOW_ANCHORED else 'elemental')
+
+    @property
+    def has_elemental(self):
+        return self.elemental_offset is not None
+
+    def invalidate(self, elemental_only=False):
+        """
+        Drops the cached table so it is rebuilt on next use. With
+        elemental_only the window is kept, and so are the window-anchored
+        ROIs (position, play, map_name) until the elemental is found again.
+        """
+        self.elemental_offset = None
+        if elemental_only and self.window is not None:
+            self._build()
+            return
+        self.window = None
+        self.table = {}
+        self.version += 1
+
+    def set_window(self, window_rect):
+        """
+        Sets the game window rectangle (left, top, width, height) and rebuilds the table.
+        The window defaults to the base resolution at the screen origin, which
+        keeps the config coordinates unchanged.
+        """
+        if window_rect is None:
+            window_rect = (0, 0, self.base_resolution[0], self.base_resolution[1])
+        self.window = tuple(window_rect)
+        self.scale = (self.window[2] / self.base_resolution[0], self.window[3] / self.base_resolution[1])
+        if self.configured_elemental and self.elemental_offset is None:
+            self.elemental_offset = tuple(self.configured_elemental)
+        logging.info(f"Game window: {self.window}, scale: {self.scale[0]:.3f}x{self.scale[1]:.3f}")
+        self._build()
+
+    def set_elemental(self, point):
+        """Stores the elemental reference (absolute screen point) as an unscaled window offset"""
+        self.elemental_offset = (
+            (point[0] - self.window[0]) / self.scale[0],
+            (point[1] - self.window[1]) / self.scale[1]
+        )
+        logging.info(f"Elemental reference offset: ({self.elemental_offset[0]:.0f}, {self.elemental_offset[1]:.0f})")
+        self._build()
+
+    def set_elemental_offset(self, offset):
+        """Restores a known unscaled elemental offset (e.g. from a checkpoint) and rebuilds the table"""
+        self.elemental_offset = tuple(offset)
+        self.rebuild()
+
+    def rebuild(self):
+        """Recomputes the absolute table from the current window and elemental offset"""
+        if self.window is not None:
+            self._build()
+
+    def _resolve(self, coords, anchor):
+        """Converts [x1, y1, x2, y2] offsets at base resolution to absolute screen coordinates"""
+        if not coords:
+            return None
+        origin_x, origin_y = (0, 0) if anchor == 'window' else self.elemental_offset
+        sx, sy = self.scale
+        return (
+            round(self.window[0] + (origin_x + coords[0]) * sx),
+            round(self.window[1] + (origin_y + coords[1]) * sy),
+            round(self.window[0] + (origin_x + coords[2]) * sx),
+            round(self.window[1] + (origin_y + coords[3]) * sy)
+        )
+
+    def resolve(self, coords, anchor='window'):
+        """Absolute bbox of ad-hoc offsets (e.g. pixel probes), or None until the anchor is known"""
+        if self.window is None or (anchor == 'elemental' and not self.has_elemental):
+            return None
+        return self._resolve(coords, anchor)
+
+    def _build(self):
+        table = {}
+        for name, coords in self.ocr_coordinates.items():
+            if name == 'attributes':
+                continue
+            anchor = self.anchor_for(name)
+            if anchor == 'elemental' and not self.has_elemental:
+                continue
+            table[name] = self._resolve(coords, anchor)
+
+        if self.has_elemental:
+            table['attributes'] = {
+                stat: {key: self._resolve(coords, 'elemental') for key, coords in buttons.items()}
+                for stat, buttons in self.ocr_coordinates.get('attributes', {}).items()
+            }
+        self.table = table
+        self.version += 1
+
+    def roi(self, name):
+        """
+        Returns the absolute bbox of a ROI.
+        Raises:
+            KeyError: If the layout for that ROI has not been built yet
+        """
+        return self.table[name]
+
+    def attribute(self, stat, key):
+        """Returns the absolute bbox of an attribute ROI/button, or None when not configured"""
+        return self.table['attributes'][stat][key]
+
+    @staticmethod
+    def center(bbox):
+        return (bbox[0] + bbox[2]) // 2, (bbox[1] + bbox[3]) // 2
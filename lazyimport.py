@@ -0,0 +1,42 @@
+import importlib
+import logging
+import time
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy module (cv2, numpy, pyautogui, pytesseract...)
+    that imports it on first attribute access, so `import gamebot` and the
+    tools only pay for what they actually use. Attribute writes
+    (pyautogui.FAILSAFE = False) go to the real module.
+    """
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+            logging.debug(f"Imported {self._name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for `name`. Use it for modules, not names:
+    `Image = lazy_import('PIL.Image')` instead of `from PIL import Image`.
+    """
+    return LazyModule(name)
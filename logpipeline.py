@@ -0,0 +1,99 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def setup_logging(log_file, level='DEBUG', max_bytes=5 * 1024 * 1024, backup_count=5, sample_interval=1.0):
+    """
+    Routes the root logger through a QueueHandler: callers only enqueue the
+    record, and a QueueListener thread formats it and writes it to a
+    size-rotated file. Each start rolls the previous log over instead of
+    truncating it.
+    Returns:
+        QueueListener: Stop it on shutdown to flush the queue
+    """
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                        backupCount=backup_count, encoding='utf-8')
+    if os.path.getsize(log_file) > 0:
+        file_handler.doRollover()
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    sampler.interval = sample_interval
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class Sampler:
+    """
+    Rate limit for hot-loop records: at most one record per key every
+    `interval` seconds, and that record says how many were dropped since
+    the previous one.
+    """
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._last = {}
+        self._dropped = Counter()
+        self._lock = threading.Lock()
+
+    def log(self, key, message, level=logging.DEBUG):
+        logger = logging.getLogger()
+        if not logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last.get(key, float('-inf')) < self.interval:
+                self._dropped[key] += 1
+                return
+            self._last[key] = now
+            dropped = self._dropped.pop(key, 0)
+        logger.log(level, f"{message} (+{dropped} similar)" if dropped else message)
+
+
+sampler = Sampler()
+
+
+def log_sampled(key, message, level=logging.DEBUG):
+    sampler.log(key, message, level)
+
+
+class CycleStats:
+    """
+    Counters accumulated during one cycle of the main loop. At the end of
+    the cycle emit() writes them as a single structured record, instead of
+    one record per click or step.
+    """
+    def __init__(self):
+        self.counters = Counter()
+        self.cycle = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def emit(self, **fields):
+        with self._lock:
+            counters, self.counters = dict(self.counters), Counter()
+        now = time.monotonic()
+        self.cycle += 1
+        summary = {'cycle': self.cycle, 'seconds': round(now - self.started, 2), **counters, **fields}
+        self.started = now
+        logging.info(f"CYCLE {json.dumps(summary, default=str)}")
+        return summary
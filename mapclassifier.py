@@ -0,0 +1,117 @@
+import logging
+import os
+
+from lazyimport import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+class MapClassifier:
+    """
+    Identifies the current map from the HUD map-name area of a frame.
+
+    Each known map has a reference crop in references_dir (<map>.png, the
+    name used in /move commands). Crops are compared with a 64-bit
+    difference hash, so a classification is a resize plus a few XORs and
+    takes well under a millisecond. References are learned automatically
+    the first time a /move to a map is confirmed.
+
+    Different maps can show the same HUD name (losttower and losttower5
+    both read "Lost Tower"). References whose hashes are within
+    max_distance of each other are flagged as ambiguous when they are
+    loaded or learned: a match on them is only trusted for the map the
+    caller expects, otherwise classify() reports no map.
+    """
+    def __init__(self, references_dir=os.path.join('images', 'maps'), max_distance=10):
+        self.references_dir = references_dir
+        self.max_distance = max_distance
+        self.references = {}
+        self.ambiguous = set()
+        self._cache = (None, None)
+        self._load()
+
+    @staticmethod
+    def dhash(image):
+        """64-bit difference hash of a BGRA/RGB/gray array"""
+        img = np.asarray(image)
+        if img.ndim == 3:
+            img = cv2.cvtColor(np.ascontiguousarray(img[:, :, :3]), cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+    @staticmethod
+    def distance(a, b):
+        return bin(a ^ b).count('1')
+
+    def _load(self):
+        if not os.path.isdir(self.references_dir):
+            return
+        for filename in os.listdir(self.references_dir):
+            name, ext = os.path.splitext(filename)
+            if ext.lower() != '.png':
+                continue
+            img = cv2.imread(os.path.join(self.references_dir, filename), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                self.references[name] = self.dhash(img)
+        logging.info(f"Loaded map references: {sorted(self.references)}")
+        self._find_duplicates()
+
+    def _find_duplicates(self):
+        """Flags the references that cannot be told apart from another one"""
+        names = sorted(self.references)
+        known, self.ambiguous = self.ambiguous, set()
+        for i, name in enumerate(names):
+            for other in names[i + 1:]:
+                if self.distance(self.references[name], self.references[other]) <= self.max_distance:
+                    self.ambiguous.update((name, other))
+                    if name not in known or other not in known:
+                        logging.warning(f"Map references {name} and {other} look the same, "
+                                        f"they are only matched when expected")
+
+    def classify(self, frame, bbox, expected=None):
+        """
+        Args:
+            expected: Map the caller believes it is on (e.g. the last /move); an
+                ambiguous match is only returned if it is this map
+        Returns:
+            tuple: (map name, hash distance) or (None, None) if no reference is close enough
+        """
+        cached_id, matches = self._cache
+        if cached_id != frame.id:
+            matches = []
+            if self.references:
+                crop_hash = self.dhash(frame.crop_array(bbox))
+                matches = sorted(
+                    (item for item in ((name, self.distance(crop_hash, ref)) for name, ref in self.references.items())
+                     if item[1] <= self.max_distance),
+                    key=lambda item: item[1]
+                )
+            self._cache = (frame.id, matches)
+
+        if not matches:
+            return (None, None)
+        if matches[0][0] not in self.ambiguous:
+            return matches[0]
+        for name, distance in matches:
+            if name == expected:
+                return (name, distance)
+        return (None, None)
+
+    def knows(self, name):
+        return name in self.references
+
+    def distinct(self, name):
+        """True if `name` has a reference that no other map shares"""
+        return name in self.references and name not in self.ambiguous
+
+    def learn(self, frame, bbox, name):
+        """Stores the current map-name crop as the reference for `name`"""
+        os.makedirs(self.references_dir, exist_ok=True)
+        crop = frame.crop(bbox)
+        crop.save(os.path.join(self.references_dir, f'{name}.png'))
+        self.references[name] = self.dhash(np.asarray(crop.convert('L')))
+        self._cache = (None, None)
+        logging.info(f"Learned map reference for {name}")
+        self._find_duplicates()
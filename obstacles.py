@@ -0,0 +1,127 @@
+import logging
+import math
+import os
+import threading
+import time
+
+from lazyimport import lazy_import
+
+np = lazy_import('numpy')
+
+
+class ObstacleMap:
+    """
+    Decaying per-map obstacle cost field.
+
+    Each map is a size x size float grid indexed by game coordinates
+    (grid[y, x]). Stuck events add stuck_weight around the cell. Failed path
+    traces add trace_weight along the trace. Costs halve every half_life
+    seconds: a grid stores its values as of `updated`, and a read multiplies
+    them by a single decay factor, so cost() is O(1). Grids are loaded
+    lazily and saved as compressed float16 arrays
+    (<directory>/<map>_obstacles.npz).
+    """
+    def __init__(self, directory=os.path.join('json', 'maps'), size=256, half_life=3600,
+                 stuck_weight=1.0, trace_weight=0.2, radius=1, block_threshold=1.5):
+        self.directory = directory
+        self.size = size
+        self.half_life = half_life
+        self.stuck_weight = stuck_weight
+        self.trace_weight = trace_weight
+        self.radius = radius
+        self.block_threshold = block_threshold
+        self.grids = {}
+        # Stuck events come from the main thread, traces from the path recorder
+        self.lock = threading.RLock()
+
+    def _path(self, map_name):
+        return os.path.join(self.directory, f'{map_name}_obstacles.npz')
+
+    def _grid(self, map_name):
+        """Returns [grid, updated] for a map, loading it on first access"""
+        entry = self.grids.get(map_name)
+        if entry is not None:
+            return entry
+        with self.lock:
+            entry = self.grids.get(map_name)
+            if entry is not None:
+                return entry
+            entry = [np.zeros((self.size, self.size), dtype=np.float32), time.time()]
+            path = self._path(map_name)
+            if os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        entry = [data['grid'].astype(np.float32), float(data['updated'])]
+                except Exception as e:
+                    logging.error(f"Error loading obstacle map {path}: {e}")
+            self.grids[map_name] = entry
+        return entry
+
+    def _factor(self, updated, now=None):
+        return 0.5 ** (((now or time.time()) - updated) / self.half_life)
+
+    def _decay(self, entry):
+        """Folds the elapsed decay into the stored values before a write"""
+        now = time.time()
+        entry[0] *= self._factor(entry[1], now)
+        entry[1] = now
+
+    def _inside(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def cost(self, map_name, x, y):
+        if not map_name or not self._inside(x, y):
+            return 0.0
+        grid, updated = self._grid(map_name)
+        return float(grid[int(y), int(x)]) * self._factor(updated)
+
+    def blocked(self, map_name, x, y):
+        return self.cost(map_name, x, y) >= self.block_threshold
+
+    def line_cost(self, map_name, start, end):
+        """Highest cost along the straight segment start -> end"""
+        steps = max(1, int(math.hypot(end[0] - start[0], end[1] - start[1])))
+        return max(
+            self.cost(map_name, round(start[0] + (end[0] - start[0]) * i / steps),
+                      round(start[1] + (end[1] - start[1]) * i / steps))
+            for i in range(steps + 1)
+        )
+
+    def add_stuck(self, map_name, x, y):
+        """Registers a stuck event at (x, y) and its neighbourhood"""
+        if not map_name or not self._inside(x, y):
+            return
+        with self.lock:
+            entry = self._grid(map_name)
+            self._decay(entry)
+            r = self.radius
+            entry[0][max(0, y - r):y + r + 1, max(0, x - r):x + r + 1] += self.stuck_weight
+            self.save(map_name)
+
+    def add_trace(self, map_name, points, stuck_end=True):
+        """
+        Registers a failed path trace ([{'x', 'y', ...}, ...]). The end point
+        counts as a stuck event unless the caller already registered it.
+        """
+        points = [(p['x'], p['y']) for p in points if self._inside(p['x'], p['y'])]
+        if not map_name or not points:
+            return
+        with self.lock:
+            entry = self._grid(map_name)
+            self._decay(entry)
+            xs, ys = zip(*set(points))
+            np.add.at(entry[0], (np.array(ys), np.array(xs)), self.trace_weight)
+            if stuck_end:
+                self.add_stuck(map_name, *points[-1])
+            else:
+                self.save(map_name)
+
+    def save(self, map_name):
+        entry = self.grids.get(map_name)
+        if entry is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez_compressed(self._path(map_name), grid=entry[0].astype(np.float16), updated=entry[1])
+        except Exception as e:
+            logging.error(f"Error saving obstacle map for {map_name}: {e}")
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from lazyimport import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+
+class OCRCorpus:
+    """
+    Labelled ROI crops used as ground truth for OCR tuning.
+
+    Layout (one folder per field):
+        <root>/<field>/<field>_<timestamp>.png
+        <root>/<field>/labels.json   verified labels {filename: text}
+        <root>/<field>/pending.json  crops captured in a session {filename: OCR reading}
+    """
+    def __init__(self, root=os.path.join('images', 'corpus'), max_per_field=500):
+        self.root = root
+        self.max_per_field = max_per_field
+        self._lock = threading.Lock()
+
+    def _field_dir(self, field):
+        return os.path.join(self.root, field)
+
+    def _load(self, field, name):
+        path = os.path.join(self._field_dir(field), name)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading {path}: {e}")
+            return {}
+
+    def _save(self, field, name, data):
+        path = os.path.join(self._field_dir(field), name)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def fields(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(self._field_dir(d)))
+
+    def add_crop(self, field, image, suggestion=''):
+        """
+        Stores a crop captured during a session as pending, with the OCR reading as suggested label.
+        Returns:
+            str: Saved filename, or None when the field already holds max_per_field crops
+        """
+        with self._lock:
+            os.makedirs(self._field_dir(field), exist_ok=True)
+            pending = self._load(field, 'pending.json')
+            labels = self._load(field, 'labels.json')
+            if len(pending) + len(labels) >= self.max_per_field:
+                return None
+
+            filename = f"{field}_{time.time_ns()}.png"
+            image.save(os.path.join(self._field_dir(field), filename))
+            pending[filename] = suggestion
+            self._save(field, 'pending.json', pending)
+            return filename
+
+    def pending(self, field):
+        """Returns {filename: suggested label} for crops not verified yet"""
+        return self._load(field, 'pending.json')
+
+    def set_label(self, field, filename, text):
+        """Moves a crop from pending to the verified labels"""
+        with self._lock:
+            pending = self._load(field, 'pending.json')
+            labels = self._load(field, 'labels.json')
+            pending.pop(filename, None)
+            labels[filename] = text
+            self._save(field, 'pending.json', pending)
+            self._save(field, 'labels.json', labels)
+
+    def discard(self, field, filename):
+        """Drops a crop that is unreadable or mis-cropped"""
+        with self._lock:
+            pending = self._load(field, 'pending.json')
+            pending.pop(filename, None)
+            self._save(field, 'pending.json', pending)
+            path = os.path.join(self._field_dir(field), filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def image_path(self, field, filename):
+        return os.path.join(self._field_dir(field), filename)
+
+    def samples(self, field):
+        """Returns [(PIL image, expected text), ...] for the verified crops of a field"""
+        samples = []
+        for filename, expected in self._load(field, 'labels.json').items():
+            path = self.image_path(field, filename)
+            if os.path.exists(path):
+                samples.append((Image.open(path).convert('RGB'), str(expected)))
+        return samples
@@ -0,0 +1,220 @@
+import logging
+import threading
+from collections import Counter
+from lazyimport import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+pytesseract = lazy_import('pytesseract')
+
+# Tesseract invocations that can be compared with scripts/ocr_eval.py.
+# The character whitelist is added per field by tesseract_config().
+OCR_BACKENDS = {
+    "tesseract_line": "--oem 3 --psm 7",
+    "tesseract_word": "--oem 3 --psm 8",
+    "tesseract_raw_line": "--oem 3 --psm 13",
+    "tesseract_lstm_line": "--oem 1 --psm 7"
+}
+
+# Used when config.json does not define "preprocess_profiles".
+# "full" is the original pipeline (cubic resize, CLAHE, NL-means, Otsu).
+DEFAULT_PROFILES = {
+    "full": {
+        "scale": 2,
+        "interpolation": "cubic",
+        "clahe": {"clip_limit": 2.0, "tile_grid": 8},
+        "denoise": True,
+        "threshold": "otsu"
+    },
+    "contrast": {
+        "scale": 2,
+        "interpolation": "cubic",
+        "clahe": {"clip_limit": 2.0, "tile_grid": 8},
+        "denoise": False,
+        "threshold": "otsu"
+    },
+    "threshold": {
+        "scale": 2,
+        "interpolation": "linear",
+        "clahe": None,
+        "denoise": False,
+        "threshold": "otsu"
+    },
+    "raw": {
+        "scale": 1,
+        "clahe": None,
+        "denoise": False,
+        "threshold": None
+    }
+}
+
+INTERPOLATIONS = {
+    "nearest": 'INTER_NEAREST',
+    "linear": 'INTER_LINEAR',
+    "cubic": 'INTER_CUBIC'
+}
+
+
+class Preprocessor:
+    """
+    Applies named preprocessing profiles to OCR crops.
+    Each ROI maps to a profile through config['ocr_profiles'], so cheap HUD
+    crops skip the expensive steps (NL-means denoising) that only noisy
+    fields need.
+    """
+    def __init__(self, profiles=None, field_profiles=None, default_profile='full'):
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.field_profiles = field_profiles or {}
+        self.default_profile = default_profile
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            profiles=config.get('preprocess_profiles'),
+            field_profiles=config.get('ocr_profiles'),
+            default_profile=config.get('ocr_profiles', {}).get('default', 'full')
+        )
+
+    def profile_for(self, field):
+        """Returns the profile name configured for a field (attributes fall back to 'attributes')"""
+        if field in self.field_profiles:
+            return self.field_profiles[field]
+        if field in ('strenght', 'agility', 'vitality', 'energy', 'command'):
+            return self.field_profiles.get('attributes', self.default_profile)
+        return self.default_profile
+
+    def _get_clahe(self, clip_limit, tile_grid):
+        """
+        CLAHE objects are reused instead of being created on every crop.
+        cv2.CLAHE is not thread safe and the OCR vote reads frames in a
+        pool, so every thread keeps its own cache.
+        """
+        cache = getattr(self._local, 'clahe', None)
+        if cache is None:
+            cache = self._local.clahe = {}
+        key = (clip_limit, tile_grid)
+        clahe = cache.get(key)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid, tile_grid))
+            cache[key] = clahe
+        return clahe
+
+    @staticmethod
+    def to_gray(image):
+        """Converts a PIL image or RGB array into a grayscale array"""
+        img = np.asarray(image)
+        if img.ndim == 2:
+            return img
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY)
+        # Screen grabs come from PIL, so colour crops are RGB
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+    def process(self, image, profile_name):
+        """
+        Runs the steps of a profile over an image.
+        Args:
+            image: PIL image or numpy array
+            profile_name: Key in the profiles table
+        Returns:
+            numpy.ndarray: Processed grayscale/binary image
+        """
+        profile = self.profiles.get(profile_name)
+        if profile is None:
+            logging.warning(f"Unknown preprocess profile '{profile_name}', using '{self.default_profile}'")
+            profile = self.profiles.get(self.default_profile, DEFAULT_PROFILES['full'])
+
+        img = self.to_gray(image)
+
+        scale = profile.get('scale', 1)
+        if scale and scale != 1:
+            interpolation = getattr(cv2, INTERPOLATIONS.get(profile.get('interpolation', 'linear'), 'INTER_LINEAR'))
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=interpolation)
+
+        clahe = profile.get('clahe')
+        if clahe:
+            img = self._get_clahe(clahe.get('clip_limit', 2.0), clahe.get('tile_grid', 8)).apply(img)
+
+        if profile.get('denoise'):
+            img = cv2.fastNlMeansDenoising(img)
+
+        threshold = profile.get('threshold')
+        if threshold == 'otsu':
+            _, img = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        elif isinstance(threshold, (int, float)):
+            _, img = cv2.threshold(img, threshold, 255, cv2.THRESH_BINARY)
+
+        return img
+
+    def process_field(self, image, field):
+        return self.process(image, self.profile_for(field))
+
+
+def tesseract_config(backend, field):
+    """Builds the tesseract config string for a backend and field"""
+    whitelist = '0123456789,' if field == 'position' else '0123456789'
+    return f"{OCR_BACKENDS[backend]} -c tessedit_char_whitelist={whitelist}"
+
+
+class OCREngine:
+    """
+    Reads text from ROI crops with the preprocessing profile and OCR backend
+    configured for each field (config['ocr_profiles'] / config['ocr_backends']).
+    """
+    def __init__(self, preprocessor, field_backends=None, default_backend='tesseract_line'):
+        self.preprocessor = preprocessor
+        self.field_backends = field_backends or {}
+        self.default_backend = default_backend
+
+    @classmethod
+    def from_config(cls, config):
+        field_backends = config.get('ocr_backends', {})
+        return cls(
+            Preprocessor.from_config(config),
+            field_backends=field_backends,
+            default_backend=field_backends.get('default', 'tesseract_line')
+        )
+
+    def backend_for(self, field):
+        if field in self.field_backends:
+            return self.field_backends[field]
+        if field in ('strenght', 'agility', 'vitality', 'energy', 'command'):
+            return self.field_backends.get('attributes', self.default_backend)
+        return self.default_backend
+
+    def read(self, image, field, profile=None, backend=None):
+        """
+        Preprocesses a crop and runs OCR on it.
+        Args:
+            image: PIL image or numpy array
+            field: ROI name, selects the default profile/backend
+            profile: Optional profile override
+            backend: Optional backend override
+        Returns:
+            str: Recognized text
+        """
+        processed = self.preprocessor.process(image, profile or self.preprocessor.profile_for(field))
+        config = tesseract_config(backend or self.backend_for(field), field)
+        return pytesseract.image_to_string(processed, config=config).strip()
+
+
+def vote(values, total=None):
+    """
+    Combines numeric readings of the same field taken from consecutive frames.
+    The majority value wins; without a majority the median is used.
+    Args:
+        values: Valid readings
+        total: Number of readings taken, including invalid ones (defaults to len(values))
+    Returns:
+        tuple: (value, confidence) with confidence in [0, 1], or (None, 0.0) without readings
+    """
+    total = total or len(values)
+    if not values:
+        return None, 0.0
+
+    value, count = Counter(values).most_common(1)[0]
+    if count * 2 <= len(values):
+        value = sorted(values)[len(values) // 2]
+        count = values.count(value)
+    return value, count / total
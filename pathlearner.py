@@ -1,154 +1,288 @@
 import json
+import os
 import time
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
-import numpy as np
+from obstacles import ObstacleMap
+
+# Shard file key -> in-memory store. 'paths' holds the good paths so the
+# existing json/maps/<map>.json files load unchanged.
+SHARD_KEYS = {'history': 'history', 'failed': 'failed', 'good': 'paths'}
+
+# Global stores written before the paths were sharded by map -> store they migrate into
+LEGACY_FILES = {'path_history.json': 'history', 'failed_paths.json': 'failed'}
+
 
 class PathLearner:
-    def __init__(self):
-        self.paths_file = 'path_history.json'
-        self.failed_paths_file = 'failed_paths.json'
-        self.good_paths_file = 'good_path.json'  # Add this line
-        self.load_history()
+    """
+    Path stores sharded by map: json/maps/<map>.json holds the history,
+    failed and good paths of one map. Shards are loaded on first access,
+    kept in an LRU of max_shards maps (a dirty shard is saved before it is
+    evicted) and saved independently.
+    """
+    def __init__(self, obstacle_settings=None, directory=os.path.join('json', 'maps'), max_shards=4):
+        self.directory = directory
+        self.max_shards = max_shards
+        self.shards = OrderedDict()
+        self.dirty = set()
+        self.lock = threading.RLock()
         self.current_path = []
-        self.obstacles = set()
+        self.obstacles = ObstacleMap(**(obstacle_settings or {}))
         self.start_time = None
 
-    def load_history(self):
-        try:
-            with open(self.paths_file, 'r') as f:
-                self.history = json.load(f)
-            with open(self.failed_paths_file, 'r') as f:
-                self.failed_paths = json.load(f)
-            with open(self.good_paths_file, 'r') as f:  # Add this block
-                self.good_paths = json.load(f)
-        except:
-            self.history = {'paths': [], 'obstacles': []}
-            self.failed_paths = {'paths': []}
-            self.good_paths = {'paths': []}  # Add this line
+    @staticmethod
+    def _key(map_name):
+        return map_name or 'unknown'
+
+    def _shard_file(self, map_name):
+        return os.path.join(self.directory, f'{self._key(map_name)}.json')
+
+    def _load_shard(self, map_name):
+        """Each store falls back to empty on its own, a missing key does not wipe the others"""
+        shard = {store: [] for store in SHARD_KEYS}
+        path = self._shard_file(map_name)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                for store, key in SHARD_KEYS.items():
+                    if isinstance(data.get(key), list):
+                        shard[store] = data[key]
+            except Exception as e:
+                logging.error(f"Error loading path shard {path}: {e}")
+        return shard
+
+    def shard(self, map_name):
+        """
+        Returns the stores of a map, loading the shard on first access.
+        Returns:
+            dict: {'history': [...], 'failed': [...], 'good': [...]}
+        """
+        key = self._key(map_name)
+        with self.lock:
+            if key in self.shards:
+                self.shards.move_to_end(key)
+                return self.shards[key]
+
+            shard = self._load_shard(key)
+            self.shards[key] = shard
+            while len(self.shards) > self.max_shards:
+                evicted = next(iter(self.shards))
+                if evicted in self.dirty:
+                    self.save_shard(evicted)
+                del self.shards[evicted]
+                logging.debug(f"Evicted path shard {evicted}")
+            return shard
+
+    def save_shard(self, map_name):
+        key = self._key(map_name)
+        with self.lock:
+            shard = self.shards.get(key)
+            if shard is None:
+                return
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._shard_file(key), 'w') as f:
+                    json.dump({file_key: shard[store] for store, file_key in SHARD_KEYS.items()}, f, indent=4)
+                self.dirty.discard(key)
+            except Exception as e:
+                logging.error(f"Error saving path shard {key}: {e}")
+
+    def migrate_legacy(self, spots=None, tolerance=10):
+        """
+        One-time split of the global path_history.json and failed_paths.json
+        into the map shards. Their entries carry no map name: each one goes
+        to the map with a spot within `tolerance` of its target (failed) or
+        last point (history), else to 'unknown'. The legacy file is renamed
+        to <file>.migrated once its entries are saved.
+        Args:
+            spots: {map name: [(x, y), ...]}, e.g. the spots of level_thresholds
+        """
+        spots = spots or {}
+
+        def map_for(position):
+            for map_name, locations in spots.items():
+                if any(self.calculate_distance(position, location) <= tolerance for location in locations):
+                    return map_name
+            return None
+
+        with self.lock:
+            for filename, store in LEGACY_FILES.items():
+                path = os.path.join(self.directory, filename)
+                if not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        entries = json.load(f).get('paths', [])
+                except Exception as e:
+                    logging.error(f"Error loading legacy path store {path}: {e}")
+                    continue
+
+                moved = {}
+                for entry in entries:
+                    if store == 'failed':
+                        end = entry.get('target')
+                    else:
+                        end = entry['points'][-1] if entry.get('points') else None
+                        end = (end['x'], end['y']) if end else None
+                    key = self._key(map_for(end) if end else None)
+                    self.shard(key)[store].append(entry)
+                    moved[key] = moved.get(key, 0) + 1
+                    self._mark_dirty(key, save=False)
+                self.save_history()
+                if self.dirty:
+                    logging.error(f"Legacy path store {path} not migrated: shards could not be saved")
+                    continue
+                os.replace(path, path + '.migrated')
+                logging.info(f"Migrated {path} into map shards: {moved}")
+
+    def _mark_dirty(self, map_name, save=True):
+        self.dirty.add(self._key(map_name))
+        if save:
+            self.save_shard(map_name)
 
     def save_history(self):
-        with open(self.paths_file, 'w') as f:
-            json.dump(self.history, f)
+        """Saves every loaded shard with unsaved changes"""
+        with self.lock:
+            for key in list(self.dirty):
+                self.save_shard(key)
 
-    def record_move(self, x: int, y: int, success: bool = True):
+    def record_move(self, x: int, y: int, success: bool = True, map_name: Optional[str] = None):
         self.current_path.append({
-            'x': x, 
+            'x': x,
             'y': y,
             'timestamp': time.time()
         })
         if not success:
-            self.obstacles.add((x, y))
-    
-    def record_good_path(self, game_bot, map_name, duration=10, interval=1):
-        print(f"Recording a good path for {map_name} for {duration} seconds at {interval} second intervals.")
-        good_path = []
-        start_time = time.time()
-        
-        while time.time() - start_time < duration:
-            current_pos = game_bot.get_current_position()
-            if current_pos:
-                good_path.append({'x': game_bot.current_x, 'y': game_bot.current_y, 'timestamp': time.time()})
-            
-            time.sleep(interval)
-
-        self._save_good_path(good_path, map_name)
+            self.obstacles.add_stuck(map_name, x, y)
 
-    def _save_good_path(self, good_path, map_name):
-        if good_path:
-            self.good_paths.setdefault(map_name, []).append({'points': good_path, 'timestamp': time.time()})
-            with open(f"{map_name}.json", 'w') as f:
-                json.dump(self.good_paths[map_name], f)
-            print(f"Good path for {map_name} saved.")
-        else:
-            print(f"No points recorded for {map_name}. Path not saved.")
+    def record_good_path(self, game_bot, map_name, duration=10, interval=1):
+        """
+        Non-blocking: the bot's PathRecorder already records every position it
+        reads, this only closes the current path after `duration` seconds so it
+        is saved as a good path. `interval` is kept for compatibility.
+        """
+        logging.info(f"Recording a good path for {map_name} for {duration} seconds.")
+        recorder = game_bot.path_recorder
+        recorder.mark_stop('good path start')
+        timer = threading.Timer(duration, recorder.mark_stop, args=('good path end',))
+        timer.daemon = True
+        timer.start()
+        return timer
 
-    def save_path(self, success: bool = True):
-        if self.current_path:
-            self.history['paths'].append({
-                'points': self.current_path,
+    def add_path(self, points, map_name, success: bool = True):
+        """Stores a path recorded by PathRecorder (called from its worker thread)"""
+        with self.lock:
+            shard = self.shard(map_name)
+            shard['history'].append({
+                'points': points,
                 'success': success,
                 'timestamp': time.time()
             })
             if success:
-                self.good_paths['paths'].append({
-                    'points': self.current_path,
+                shard['good'].append({
+                    'points': points,
                     'timestamp': time.time()
                 })
-                with open(self.good_paths_file, 'w') as f:
-                    json.dump(self.good_paths, f)
+            self._mark_dirty(map_name)
+
+    def _save_good_path(self, good_path, map_name):
+        if good_path:
+            with self.lock:
+                self.shard(map_name)['good'].append({'points': good_path, 'timestamp': time.time()})
+                self._mark_dirty(map_name)
+            logging.info(f"Good path for {map_name} saved.")
+        else:
+            logging.info(f"No points recorded for {map_name}. Path not saved.")
+
+    def save_path(self, success: bool = True, map_name: Optional[str] = None):
+        if self.current_path:
+            self.add_path(self.current_path, map_name, success)
             self.current_path = []
-            self.save_history()
 
-    def save_failed_path(self, start_pos: Tuple[int, int], target_pos: Tuple[int, int]):
+    def save_failed_path(self, start_pos: Tuple[int, int], target_pos: Tuple[int, int], map_name: Optional[str] = None,
+                         path_taken: Optional[List[Dict]] = None, stuck_end: bool = True):
+        """Stores a failed attempt and feeds its trace to the obstacle heatmap"""
+        path_taken = self.current_path if path_taken is None else path_taken
         failed_path = {
             'start': start_pos,
             'target': target_pos,
             'timestamp': time.time(),
-            'path_taken': self.current_path
+            'path_taken': path_taken
         }
-        self.failed_paths['paths'].append(failed_path)
-        with open(self.failed_paths_file, 'w') as f:
-            json.dump(self.failed_paths, f)
-
-    def should_skip_path(self, start_pos: Tuple[int, int], target_pos: Tuple[int, int]) -> bool:
-        for path in self.failed_paths['paths']:
-            if (path['start'] == start_pos and 
-                path['target'] == target_pos and 
-                time.time() - path['timestamp'] < 3600):  # Skip for 1 hour
-                return True
-        return False
-
-    def get_best_path(self, current_pos: Tuple[int, int], target_pos: Tuple[int, int]) -> Optional[List[Dict[str, int]]]:
-        successful_paths = [p for p in self.history['paths'] 
-                            if p['success'] and time.time() - p['timestamp'] < 86400]  # Only use paths from last 24h
-        
-        if not successful_paths:
+        with self.lock:
+            self.shard(map_name)['failed'].append(failed_path)
+            self._mark_dirty(map_name)
+            self.obstacles.add_trace(map_name, path_taken, stuck_end=stuck_end)
+
+    def should_skip_path(self, start_pos: Tuple[int, int], target_pos: Tuple[int, int], map_name: Optional[str] = None) -> bool:
+        # Blocked while the straight line crosses cells whose decayed obstacle cost is high
+        return self.obstacles.line_cost(map_name, start_pos, target_pos) >= self.obstacles.block_threshold
+
+    def get_best_path(self, current_pos: Tuple[int, int], target_pos: Tuple[int, int],
+                      map_name: Optional[str] = None) -> Optional[List[Dict[str, int]]]:
+        """
+        Best stored path from current_pos to target_pos: the good store first
+        (json/maps/<map>.json 'paths'), then successful history from the last 24h.
+        """
+        with self.lock:
+            shard = self.shard(map_name)
+            candidates = [p for p in shard['good'] if p.get('points')]
+            if not candidates:
+                candidates = [p for p in shard['history']
+                              if p['success'] and p.get('points') and time.time() - p['timestamp'] < 86400]
+
+        if not candidates:
             return None
-        
+
         best_path = None
         best_score = float('inf')
-        
-        for path in successful_paths:
+
+        for path in candidates:
             start = (path['points'][0]['x'], path['points'][0]['y'])
             end = (path['points'][-1]['x'], path['points'][-1]['y'])
-            
+
             # Calculate distances
             start_dist = self.calculate_distance(start, current_pos)
             end_dist = self.calculate_distance(end, target_pos)
-            
+
             # Calculate path efficiency
             path_length = len(path['points'])
             direct_distance = self.calculate_distance(start, end)
             efficiency = direct_distance / path_length if path_length > 0 else 0
-            
+
             # Calculate score (lower is better)
             score = (start_dist + end_dist) / (efficiency + 0.1)
-            
+
             if score < best_score:
                 best_score = score
                 best_path = path['points']
-                
+
         return best_path
 
+    def walk_cost(self, map_name: Optional[str], target_pos: Tuple[int, int], tolerance: int = 10) -> Optional[int]:
+        """Points of the shortest stored good path ending at target_pos, None if there is none"""
+        with self.lock:
+            lengths = [len(p['points']) for p in self.shard(map_name)['good']
+                       if p['points'] and self.calculate_distance(
+                           (p['points'][-1]['x'], p['points'][-1]['y']), target_pos) <= tolerance]
+        return min(lengths) if lengths else None
+
     def calculate_distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
         return ((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)**0.5
 
-    def clean_old_paths(self, max_age_hours: int = 24):
+    def clean_old_paths(self, max_age_hours: int = 24, map_name: Optional[str] = None):
+        """Drops old history/failed entries of one map, or of every loaded shard"""
         current_time = time.time()
-        
-        # Clean successful paths
-        self.history['paths'] = [
-            p for p in self.history['paths'] 
-            if current_time - p['timestamp'] < max_age_hours * 3600
-        ]
-        
-        # Clean failed paths
-        self.failed_paths['paths'] = [
-            p for p in self.failed_paths['paths']
-            if current_time - p['timestamp'] < max_age_hours * 3600
-        ]
-        
-        self.save_history()
-        with open(self.failed_paths_file, 'w') as f:
-            json.dump(self.failed_paths, f)
\ No newline at end of file
+        with self.lock:
+            keys = [self._key(map_name)] if map_name else list(self.shards)
+            for key in keys:
+                shard = self.shard(key)
+                for store in ('history', 'failed'):
+                    shard[store] = [
+                        p for p in shard[store]
+                        if current_time - p['timestamp'] < max_age_hours * 3600
+                    ]
+                self._mark_dirty(key)
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from collections import deque
+
+STOP = 'stop'
+
+
+class PathRecorder:
+    """
+    Records the position stream in the background.
+
+    on_position() is called by the bot for every position it reads and only
+    appends to a ring buffer, so it never slows down movement. A worker
+    thread drains the buffer, cuts paths at map changes and stop events
+    (explicit mark_stop() or no movement for stop_seconds) and hands the
+    finished paths to PathLearner off the hot path: add_path for paths that
+    got somewhere, save_failed_path (and so the obstacle heatmap) for paths
+    cut short by mark_stop(success=False).
+    """
+    def __init__(self, path_learner, capacity=4096, stop_seconds=2.0, min_points=5, flush_interval=1.0):
+        self.path_learner = path_learner
+        self.stop_seconds = stop_seconds
+        self.min_points = min_points
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=capacity)
+        self.segment = None
+        self.saved = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def on_position(self, x, y, map_name, timestamp=None):
+        """Position stream subscriber: O(1), never blocks"""
+        self.buffer.append((timestamp or time.time(), x, y, map_name))
+
+    def mark_stop(self, reason='', success=True, target=None):
+        """
+        Closes the current path (e.g. on /move, /reset or when farming starts).
+        Args:
+            success: False when the path ended stuck; it is stored as a failed trace
+            target: Where the failed path was heading, if known
+        """
+        self.buffer.append((time.time(), STOP, reason, (success, target)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='path-recorder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the worker and flushes whatever is buffered"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._drain()
+        self._close_segment('shutdown')
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self._drain()
+                if self.segment and time.time() - self.segment['last_move'] >= self.stop_seconds:
+                    self._close_segment('idle')
+            except Exception as e:
+                logging.error(f"Path recorder error: {e}")
+
+    def _drain(self):
+        while self.buffer:
+            timestamp, x, y, map_name = self.buffer.popleft()
+            if x == STOP:
+                self._close_segment(y, *map_name)
+            else:
+                self._add_sample(timestamp, x, y, map_name)
+
+    def _add_sample(self, timestamp, x, y, map_name):
+        segment = self.segment
+        if segment and segment['map'] != map_name:
+            self._close_segment('map change')
+            segment = None
+
+        if segment is None:
+            self.segment = {'map': map_name, 'points': [], 'last_move': timestamp}
+            segment = self.segment
+
+        points = segment['points']
+        if points and (points[-1]['x'], points[-1]['y']) == (x, y):
+            if timestamp - segment['last_move'] >= self.stop_seconds:
+                self._close_segment('stopped')
+            return
+
+        points.append({'x': x, 'y': y, 'timestamp': timestamp})
+        segment['last_move'] = timestamp
+
+    def _close_segment(self, reason, success=True, target=None):
+        segment, self.segment = self.segment, None
+        if not segment or not segment['points']:
+            return
+        points = segment['points']
+        try:
+            if not success:
+                start = (points[0]['x'], points[0]['y'])
+                # The caller registers the stuck point itself, only the trace is added here
+                self.path_learner.save_failed_path(start, target, segment['map'], path_taken=points, stuck_end=False)
+                logging.debug(f"Recorded failed path on {segment['map']} with {len(points)} points ({reason})")
+                return
+            if len(points) < self.min_points:
+                return
+            self.path_learner.add_path(points, segment['map'])
+            self.saved += 1
+            logging.debug(f"Recorded path on {segment['map']} with {len(points)} points ({reason})")
+        except Exception as e:
+            logging.error(f"Error saving recorded path: {e}")
@@ -0,0 +1,121 @@
+import logging
+import math
+
+
+class PathReplayer:
+    """
+    Follows stored good paths instead of walking greedily towards the target.
+
+    The best recorded path for (map, start, target) comes from
+    PathLearner.get_best_path. The current position is spliced onto its
+    nearest point, and the remaining points are thinned to waypoints. They
+    are then streamed to the bot's movement controller (GameBot.step_towards).
+    The path is only recomputed when the character deviates more than
+    max_deviation from the next waypoints.
+    """
+    def __init__(self, bot, settings=None):
+        settings = settings or {}
+        self.bot = bot
+        self.enabled = settings.get('enabled', True)
+        self.waypoint_spacing = settings.get('waypoint_spacing', 8)
+        self.waypoint_tolerance = settings.get('waypoint_tolerance', 6)
+        self.max_deviation = settings.get('max_deviation', 25)
+        self.max_start_distance = settings.get('max_start_distance', 30)
+        self.max_end_distance = settings.get('max_end_distance', 15)
+        self.max_replans = settings.get('max_replans', 2)
+        self.stuck_steps = settings.get('stuck_steps', 10)
+
+    @staticmethod
+    def distance(a, b):
+        return math.hypot(a[0] - b[0], a[1] - b[1])
+
+    def plan(self, map_name, start, target):
+        """
+        Returns:
+            list: Waypoints [(x, y), ...] from the point nearest to `start` up to the
+                  end of the best stored path, or None if no usable path is stored
+        """
+        points = self.bot.path_learner.get_best_path(start, target, map_name)
+        if not points:
+            return None
+
+        coords = [(p['x'], p['y']) for p in points]
+        if self.distance(coords[-1], target) > self.max_end_distance:
+            return None
+
+        nearest = min(range(len(coords)), key=lambda i: self.distance(coords[i], start))
+        if self.distance(coords[nearest], start) > self.max_start_distance:
+            return None
+
+        obstacles = self.bot.path_learner.obstacles
+        if any(obstacles.blocked(map_name, x, y) for x, y in coords[nearest:]):
+            return None
+
+        waypoints = []
+        for point in coords[nearest:]:
+            if not waypoints or self.distance(point, waypoints[-1]) >= self.waypoint_spacing:
+                waypoints.append(point)
+        if waypoints[-1] != coords[-1]:
+            waypoints.append(coords[-1])
+        return waypoints
+
+    def _deviation(self, position, waypoints, index):
+        """Distance from the position to the closest of the next few waypoints"""
+        upcoming = waypoints[index:index + 3]
+        return min(self.distance(position, point) for point in upcoming)
+
+    def follow(self, target_x, target_y):
+        """
+        Walks the stored path towards (target_x, target_y).
+        Returns:
+            bool: True if the end of the path was reached, False to fall back
+                  to the greedy movement (no path, stuck or too many replans)
+        """
+        bot = self.bot
+        if not self.enabled or not bot.get_current_position():
+            return False
+
+        map_name = bot.current_map_cache
+        target = (target_x, target_y)
+        waypoints = self.plan(map_name, (bot.current_x, bot.current_y), target)
+        if not waypoints:
+            return False
+        logging.info(f"Replaying stored path on {map_name}: {len(waypoints)} waypoints")
+
+        index = 0
+        replans = 0
+        stuck = 0
+        last = (bot.current_x, bot.current_y)
+        while bot.running:
+            if not bot.get_current_position():
+                return False
+            position = (bot.current_x, bot.current_y)
+
+            while index < len(waypoints) and self.distance(position, waypoints[index]) <= self.waypoint_tolerance:
+                index += 1
+            if index >= len(waypoints):
+                return True
+
+            if self._deviation(position, waypoints, index) > self.max_deviation:
+                replans += 1
+                if replans > self.max_replans:
+                    logging.warning("Path replay: too many deviations, falling back")
+                    return False
+                logging.info(f"Path replay: deviated at {position}, replanning")
+                waypoints = self.plan(map_name, position, target)
+                if not waypoints:
+                    return False
+                index = 0
+                continue
+
+            stuck = stuck + 1 if position == last else 0
+            if stuck >= self.stuck_steps:
+                logging.warning(f"Path replay: stuck at {position}, falling back")
+                bot.path_learner.obstacles.add_stuck(map_name, *position)
+                bot.path_recorder.mark_stop('stuck', success=False, target=target)
+                return False
+            last = position
+
+            waypoint = waypoints[index]
+            bot.step_towards(waypoint[0] - position[0], waypoint[1] - position[1], self.waypoint_tolerance)
+        return False
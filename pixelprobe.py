@@ -0,0 +1,136 @@
+import logging
+
+from lazyimport import lazy_import
+
+np = lazy_import('numpy')
+
+KINDS = ('color', 'fill')
+
+
+class PixelProbes:
+    """
+    Named status signals that only need a few pixels: play button colour,
+    HP bar fill, stats window open...
+
+    Each probe samples a tiny patch (or the middle row of a bar) of an ROI:
+        {"roi": "play"} or {"bbox": [x1, y1, x2, y2], "anchor": "window" | "elemental"}
+    It compares the samples with an RGB colour within `tolerance`. The pixel
+    indices of every probe are built once per layout version. A frame is
+    evaluated with one fancy-index gather and one distance computation for
+    all probes, which takes microseconds:
+        color -> bool (share of matching samples >= min_ratio)
+        fill  -> float (share of the bar's samples that match, e.g. HP left)
+    Probes without a colour can learn it from a frame where the state is
+    known (learn()). Results are cached per frame id.
+    """
+    def __init__(self, layout, probes=None, max_samples=8):
+        self.layout = layout
+        self.probes = {name: dict(spec) for name, spec in (probes or {}).items()}
+        self.max_samples = max_samples
+        self._version = None
+        self._names = []
+        self._index = None
+        self._cache = (None, {})
+
+    def _bbox(self, spec):
+        if spec.get('roi'):
+            return self.layout.table.get(spec['roi'])
+        if spec.get('bbox'):
+            return self.layout.resolve(spec['bbox'], spec.get('anchor', 'window'))
+        return None
+
+    def _samples(self, bbox, kind, count):
+        """Sample coordinates (ys, xs) inside a bbox, count x count for colour probes"""
+        x1, y1, x2, y2 = bbox
+        if kind == 'fill':
+            # One sample per column along the middle row of the bar
+            xs = np.arange(x1, max(x1 + 1, x2))
+            return np.full(len(xs), (y1 + y2) // 2), xs
+        xs = np.linspace(x1, max(x1, x2 - 1), min(count, max(1, x2 - x1))).round().astype(int)
+        ys = np.linspace(y1, max(y1, y2 - 1), min(count, max(1, y2 - y1))).round().astype(int)
+        grid_y, grid_x = np.meshgrid(ys, xs, indexing='ij')
+        return grid_y.ravel(), grid_x.ravel()
+
+    def _build(self):
+        """Concatenates the samples of every resolvable probe, with their target colour"""
+        names, ys, xs, targets, tolerances, starts = [], [], [], [], [], []
+        offset = 0
+        for name, spec in self.probes.items():
+            if spec.get('color') is None or spec.get('kind', 'color') not in KINDS:
+                continue
+            try:
+                bbox = self._bbox(spec)
+            except Exception:
+                bbox = None
+            if not bbox:
+                continue
+            sample_y, sample_x = self._samples(bbox, spec.get('kind', 'color'), spec.get('samples', self.max_samples))
+            names.append(name)
+            starts.append(offset)
+            offset += len(sample_x)
+            ys.append(sample_y)
+            xs.append(sample_x)
+            red, green, blue = spec['color']
+            targets.append(np.tile([blue, green, red], (len(sample_x), 1)))
+            tolerances.append(np.full(len(sample_x), spec.get('tolerance', 40)))
+
+        self._names = names
+        self._index = None
+        if names:
+            self._index = {
+                'ys': np.concatenate(ys), 'xs': np.concatenate(xs),
+                'targets': np.concatenate(targets).astype(np.int32),
+                'tolerances': np.concatenate(tolerances).astype(np.int32) ** 2,
+                'starts': np.array(starts), 'counts': np.diff(starts + [offset])
+            }
+        self._version = self.layout.version
+
+    def evaluate(self, frame):
+        """
+        Returns:
+            dict: {probe name: bool | float} for every probe that can be evaluated
+        """
+        cached_id, cached = self._cache
+        if cached_id == frame.id:
+            return cached
+        if self._version != self.layout.version:
+            self._build()
+
+        results = {}
+        index = self._index
+        if index is not None:
+            height, width = frame.pixels.shape[:2]
+            ys = np.clip(index['ys'], 0, height - 1)
+            xs = np.clip(index['xs'], 0, width - 1)
+            pixels = frame.pixels[ys, xs, :3].astype(np.int32)
+            matches = ((pixels - index['targets']) ** 2).sum(axis=1) <= index['tolerances']
+            ratios = np.add.reduceat(matches, index['starts']) / index['counts']
+            for name, ratio in zip(self._names, ratios):
+                spec = self.probes[name]
+                if spec.get('kind', 'color') == 'fill':
+                    results[name] = float(ratio)
+                else:
+                    results[name] = bool(ratio >= spec.get('min_ratio', 0.5))
+
+        self._cache = (frame.id, results)
+        return results
+
+    def get(self, frame, name):
+        """Returns the value of one probe, or None if it is not configured/resolvable"""
+        return self.evaluate(frame).get(name)
+
+    def learn(self, frame, name):
+        """Stores the mean colour of the probe area on `frame` as the colour for the matching state"""
+        spec = self.probes.get(name)
+        bbox = self._bbox(spec) if spec else None
+        if not bbox:
+            return False
+        patch = frame.crop_array(bbox)
+        if patch.size == 0:
+            return False
+        blue, green, red = patch[:, :, :3].reshape(-1, 3).mean(axis=0)
+        spec['color'] = [int(red), int(green), int(blue)]
+        self._version = None
+        self._cache = (None, {})
+        logging.info(f"Learned probe colour for {name}: {spec['color']}")
+        return True
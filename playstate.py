@@ -0,0 +1,75 @@
+import logging
+import time
+
+IDLE = 'idle'
+WALKING = 'walking'
+FARMING = 'farming'
+INTERRUPTED = 'interrupted'
+
+
+class PlayStateMachine:
+    """
+    Farming state, driven by what the screen shows:
+
+        idle --walk_to()--> walking --farming()--> farming
+        farming --observe(): button off, moved off the spot, map changed--> interrupted
+        idle/interrupted --observe(): button on at the spot--> farming
+
+    The main loop only walks to the spot when needs_walk() says so, instead
+    of walking back every cycle while play is already running.
+    """
+    def __init__(self, spot_tolerance=10):
+        self.spot_tolerance = spot_tolerance
+        self.state = IDLE
+        self.map = None
+        self.spot = None
+        self.since = time.monotonic()
+
+    def _set(self, state, reason):
+        if state != self.state:
+            logging.info(f"Play state: {self.state} -> {state} ({reason}) after {time.monotonic() - self.since:.0f}s")
+            self.state = state
+            self.since = time.monotonic()
+
+    def at_spot(self, position, spot=None):
+        spot = spot or self.spot
+        return bool(position and spot) and \
+            abs(position[0] - spot[0]) <= self.spot_tolerance and abs(position[1] - spot[1]) <= self.spot_tolerance
+
+    def walk_to(self, map_name, spot):
+        self.map, self.spot = map_name, tuple(spot)
+        self._set(WALKING, f"to {map_name} {self.spot}")
+
+    def farming(self, map_name, spot):
+        self.map, self.spot = map_name, tuple(spot)
+        self._set(FARMING, 'play active')
+
+    def interrupt(self, reason):
+        if self.state in (WALKING, FARMING):
+            self._set(INTERRUPTED, reason)
+
+    def stop(self, reason='stopped'):
+        self._set(IDLE, reason)
+
+    def observe(self, play_active, position, map_name):
+        """
+        Updates the state from one frame.
+        Args:
+            play_active: Play button probe (True/False, None if unknown)
+            position: (x, y) read on the frame, or None
+            map_name: Map identified on the frame, or None
+        """
+        if self.state == FARMING:
+            if play_active is False:
+                self.interrupt('play button off')
+            elif map_name and self.map and map_name != self.map:
+                self.interrupt(f'map changed to {map_name}')
+            elif position and self.spot and not self.at_spot(position):
+                self.interrupt(f'moved off the spot to {position}')
+        elif self.state in (IDLE, INTERRUPTED) and play_active and self.at_spot(position):
+            if not map_name or not self.map or map_name == self.map:
+                self._set(FARMING, 'play button on at the spot')
+
+    def needs_walk(self, map_name, spot):
+        """False while already farming at this spot on this map"""
+        return not (self.state == FARMING and self.map == map_name and self.spot == tuple(spot))
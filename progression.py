@@ -0,0 +1,116 @@
+import logging
+import time
+from bisect import bisect_right
+
+
+class ProgressionPlan:
+    """
+    config['level_thresholds'] compiled once: brackets sorted by level with
+    bisect lookup, and one or more candidate spots per bracket.
+
+    A bracket accepts the legacy single "location" or a "spots" list:
+        "150": {"command": "/move losttower",
+                "spots": [{"location": [221, 82], "xp_rate": 1.2}, {"location": [190, 60]}]}
+    Spots are ranked by expected XP rate in levels/hour (from config,
+    replaced by measured rates through record_xp_rate). A spot without a
+    rate is explored first: it counts as the bracket's best rate and wins
+    the tie, so it gets farmed and measured once instead of always losing
+    to measured spots. Ties go to the lower walk cost (shortest stored
+    good path to the spot), then to config order.
+    Occupied spots are skipped until their cool-down expires, and spots
+    that were busy on more than avoid_busy_ratio of past checks rank last.
+    """
+    def __init__(self, level_thresholds, path_learner=None, walk_cost_ttl=600, avoid_busy_ratio=0.5):
+        self.path_learner = path_learner
+        self.walk_cost_ttl = walk_cost_ttl
+        self.avoid_busy_ratio = avoid_busy_ratio
+        self.levels = []
+        self.brackets = []
+        for threshold, entry in sorted(level_thresholds.items(), key=lambda item: int(item[0])):
+            spots = entry.get('spots') or [{'location': entry['location']}]
+            self.levels.append(int(threshold))
+            self.brackets.append({
+                'level': int(threshold),
+                'command': entry['command'],
+                'map': entry['command'].replace('/move ', ''),
+                'spots': [{
+                    'location': tuple(spot['location']),
+                    'xp_rate': spot.get('xp_rate'),
+                    'walk_cost': None,
+                    'walk_cost_at': 0,
+                    'occupied_until': 0,
+                    'busy': 0.0,
+                    'order': order
+                } for order, spot in enumerate(spots)]
+            })
+
+    def bracket_for(self, level):
+        index = bisect_right(self.levels, level) - 1
+        return self.brackets[index] if index >= 0 else None
+
+    def _walk_cost(self, bracket, spot):
+        if self.path_learner is None:
+            return None
+        now = time.time()
+        if now - spot['walk_cost_at'] > self.walk_cost_ttl:
+            spot['walk_cost'] = self.path_learner.walk_cost(bracket['map'], spot['location'])
+            spot['walk_cost_at'] = now
+        return spot['walk_cost']
+
+    def _rank(self, bracket, spot, default_rate):
+        walk_cost = self._walk_cost(bracket, spot)
+        rate = spot['xp_rate'] if spot['xp_rate'] is not None else default_rate
+        return (spot['busy'] > self.avoid_busy_ratio, -rate, spot['xp_rate'] is not None,
+                walk_cost if walk_cost is not None else float('inf'), spot['order'])
+
+    def target_for(self, level):
+        """
+        Returns:
+            dict: {'command', 'map', 'location', 'level'} of the best free spot for
+                  `level`, or None if the level is below every threshold
+        """
+        bracket = self.bracket_for(level)
+        if bracket is None:
+            return None
+        now = time.time()
+        free = [spot for spot in bracket['spots'] if spot['occupied_until'] <= now]
+        if not free:
+            # Every spot is taken: go to the one that frees up first
+            free = [min(bracket['spots'], key=lambda spot: spot['occupied_until'])]
+        rates = [spot['xp_rate'] for spot in bracket['spots'] if spot['xp_rate'] is not None]
+        default_rate = max(rates) if rates else 0
+        spot = min(free, key=lambda spot: self._rank(bracket, spot, default_rate))
+        return {'command': bracket['command'], 'map': bracket['map'],
+                'location': list(spot['location']), 'level': bracket['level']}
+
+    def _find(self, map_name, location, level=None):
+        for bracket in self.brackets:
+            if bracket['map'] != map_name or (level is not None and bracket['level'] != level):
+                continue
+            for spot in bracket['spots']:
+                if spot['location'] == tuple(location):
+                    return spot
+        return None
+
+    def mark_occupied(self, map_name, location, seconds=600):
+        """Skips a spot for `seconds` (someone else is farming there)"""
+        spot = self._find(map_name, location)
+        if spot:
+            spot['occupied_until'] = time.time() + seconds
+            logging.info(f"Spot {map_name} {tuple(location)} marked occupied for {seconds}s")
+
+    def set_busy_ratio(self, map_name, location, ratio):
+        """Share of past checks in which the spot was crowded (see SpotMonitor)"""
+        spot = self._find(map_name, location)
+        if spot:
+            spot['busy'] = ratio
+
+    def xp_rate(self, map_name, location):
+        spot = self._find(map_name, location)
+        return spot['xp_rate'] if spot else None
+
+    def record_xp_rate(self, map_name, location, rate, weight=0.3, level=None):
+        """Blends a measured rate (levels/hour) into the spot's expected rate"""
+        spot = self._find(map_name, location, level)
+        if spot:
+            spot['xp_rate'] = rate if spot['xp_rate'] is None else (1 - weight) * spot['xp_rate'] + weight * rate
@@ -0,0 +1,117 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from conditions import await_condition
+
+
+class ResetTransaction:
+    """
+    Runs a whole reset as one planned sequence:
+        /reset -> read available points -> distribute -> /move -> walk -> play -> verify
+
+    The plan (target bracket, command, spot, distribution) is computed up
+    front in a background thread while /reset is confirmed; that thread
+    also loads the path shard and obstacle grid of the target map from
+    disk, so the walk does not wait on file reads. The full
+    stats read happens once at the end, on the calling thread after the
+    walk, instead of before and after every step. It toggles the stats
+    window, writes current_status.json and may send recovery commands, so
+    it must not overlap the walk and play clicks.
+    The reset-to-farming downtime is logged and stored in current_status.json.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.timings = {}
+        self.plan = None
+
+    @contextmanager
+    def _step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def make_plan(self, resets_before):
+        """Computes everything the reset needs that does not depend on the screen"""
+        target = self.bot.target_for_level(0)
+        if target:
+            # Warm the stores the walk reads: stored paths and the obstacle grid of the target map
+            learner = self.bot.path_learner
+            learner.shard(target['map'])
+            learner.obstacles.cost(target['map'], *target['location'])
+        return {
+            'expected_reset': resets_before + 1,
+            'command': target['command'] if target else None,
+            'location': target['location'] if target else None,
+            'distribution': dict(self.bot.config['stat_distribution'])
+        }
+
+    def _read_available_points(self):
+        try:
+            return self.bot._read_numeric_area('available_points')
+        except ValueError as e:
+            logging.warning(f"Reset: available points read failed ({e}), reading all stats")
+            self.bot.read_all_stats()
+            return self.bot.get_game_state()['available_points']
+
+    def run(self):
+        """
+        Returns:
+            bool: True if the final verification matched the plan
+        """
+        bot = self.bot
+        start = time.perf_counter()
+        resets_before = (bot.get_game_state() or {}).get('current_reset', 0)
+        bot.play = False
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='reset') as pool:
+            plan_future = pool.submit(self.make_plan, resets_before)
+
+            with self._step('reset'):
+                bot.ensure_stats_window_closed()
+                before = bot.read_position_on()
+                bot.chat.send('/reset', confirm=bot.conditions.coordinates_changed(before),
+                              timeout=bot.config.get('chat', {}).get('reset_timeout', 5))
+                bot.update_game_state({'current_reset': resets_before + 1, 'current_level': 0})
+
+            self.plan = plan_future.result()
+
+            with self._step('distribute'):
+                bot.ensure_stats_window_open()
+                # The panel can still show the old level right after /reset
+                if bot.layout.has_elemental:
+                    await_condition(bot.conditions.level_reads(0), 2.0, bot.frames, description='level reads 0')
+                available_points = self._read_available_points()
+                if available_points and available_points > 0:
+                    if bot.config.get('stat_commands', {}).get('enabled'):
+                        bot.add_points_with_commands(available_points)
+                    else:
+                        bot.add_points_with_clicks(available_points)
+                    bot.input.flush()
+
+            if self.plan['command']:
+                with self._step('move'):
+                    bot.send_move_command(self.plan['command'])
+                    bot.update_game_state({'current_map': self.plan['command'].replace('/move ', '')})
+
+                with self._step('walk'):
+                    x, y = self.plan['location']
+                    bot.move_to_coordinates(x, y)
+                    bot.check_and_click_play(x, y)
+
+        with self._step('verify'):
+            try:
+                level, resets = bot.read_all_stats()
+            except Exception as e:
+                logging.error(f"Reset verification failed: {e}")
+                level, resets = None, None
+
+        downtime = time.perf_counter() - start
+        verified = resets == self.plan['expected_reset'] and level is not None and level < bot.config['reset_level']
+        steps = ', '.join(f"{name}={seconds:.1f}s" for name, seconds in self.timings.items())
+        logging.info(f"======== RESET DOWNTIME: {downtime:.1f}s ({steps}) verified={verified} ========")
+        bot.update_game_state({'last_reset_downtime': round(downtime, 2)})
+        return verified
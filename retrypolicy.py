@@ -0,0 +1,141 @@
+import logging
+import random
+import time
+
+
+class RetryBudgetExceeded(Exception):
+    """Raised when an operation runs out of attempts or hits its deadline"""
+    def __init__(self, name, attempts, last_error=None):
+        self.name = name
+        self.attempts = attempts
+        self.last_error = last_error
+        super().__init__(f"{name}: gave up after {attempts} attempts (last error: {last_error})")
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive exhausted retry budgets of an operation.
+    When the threshold is reached it runs the recovery action (re-locating
+    the reference point, /move...) instead of letting the caller spin.
+    """
+    def __init__(self, name, failure_threshold=3, recovery=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery = recovery
+        self.failures = 0
+        self.trips = 0
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self):
+        """Returns True when the breaker tripped and recovery was run"""
+        self.failures += 1
+        if self.failures < self.failure_threshold:
+            return False
+
+        self.failures = 0
+        self.trips += 1
+        logging.warning(f"Circuit breaker '{self.name}' tripped ({self.trips}), escalating to recovery")
+        if self.recovery:
+            try:
+                self.recovery()
+            except Exception as e:
+                logging.error(f"Recovery for '{self.name}' failed: {e}")
+        return True
+
+
+class RetryPolicy:
+    """
+    Bounded retries with jittered exponential backoff and an overall deadline.
+    Args:
+        name: Operation name used in logs
+        max_attempts: Maximum number of calls
+        base_delay: Delay after the first failure, doubled on each retry
+        max_delay: Upper bound for a single delay
+        deadline: Seconds after which no new attempt is started
+        jitter: Fraction of each delay that is randomized (0 disables it)
+        breaker: Optional CircuitBreaker notified of successes and exhausted budgets
+    """
+    def __init__(self, name, max_attempts=5, base_delay=0.1, max_delay=2.0, deadline=10.0,
+                 jitter=0.5, breaker=None):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.jitter = jitter
+        self.breaker = breaker
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (0-based)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1 - self.jitter * random.random())
+
+    def run(self, operation, validate=None):
+        """
+        Calls operation until it returns a valid result.
+        Args:
+            operation: Callable without arguments
+            validate: Optional callable(result) -> bool; invalid results are retried
+        Returns:
+            The first valid result
+        Raises:
+            RetryBudgetExceeded: When attempts or deadline are exhausted
+        """
+        end_time = time.monotonic() + self.deadline
+        last_error = None
+        attempt = 0
+
+        while attempt < self.max_attempts:
+            attempt += 1
+            try:
+                result = operation()
+                if validate is None or validate(result):
+                    if self.breaker:
+                        self.breaker.record_success()
+                    return result
+                last_error = f"invalid result {result!r}"
+            except Exception as e:
+                last_error = e
+
+            logging.debug(f"{self.name}: attempt {attempt}/{self.max_attempts} failed: {last_error}")
+            if attempt >= self.max_attempts:
+                break
+            delay = self.backoff(attempt - 1)
+            if time.monotonic() + delay >= end_time:
+                break
+            time.sleep(delay)
+
+        if self.breaker:
+            self.breaker.record_failure()
+        raise RetryBudgetExceeded(self.name, attempt, last_error)
+
+
+class RetryPolicies:
+    """
+    Per-operation retry policies built from config['retry_policies'].
+    Operations without an entry use the 'default' policy.
+    """
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+        self.policies = {}
+        self.recoveries = {}
+
+    def set_recovery(self, name, recovery):
+        """Registers the action run when the circuit breaker of an operation trips"""
+        self.recoveries[name] = recovery
+        if name in self.policies and self.policies[name].breaker:
+            self.policies[name].breaker.recovery = recovery
+
+    def policy(self, name):
+        if name not in self.policies:
+            options = dict(self.settings.get('default', {}))
+            options.update(self.settings.get(name, {}))
+            threshold = options.pop('breaker_threshold', 3)
+            breaker = CircuitBreaker(name, threshold, self.recoveries.get(name)) if threshold else None
+            self.policies[name] = RetryPolicy(name, breaker=breaker, **options)
+        return self.policies[name]
+
+    def run(self, name, operation, validate=None):
+        return self.policy(name).run(operation, validate)
@@ -0,0 +1,275 @@
+import copy
+import logging
+import os
+
+from configcheck import validate_config
+from layout import RoiLayout
+from lazyimport import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# How the text sits inside each ROI: values grow to the left in the stats
+# panel (right aligned) and around the middle in the coordinate HUD.
+ALIGNMENT = {'position': 'center'}
+STATS_FIELDS = ('level', 'reset', 'available_points')
+
+
+class RoiCalibrator:
+    """
+    Finds the OCR regions on a frame instead of measuring them by hand.
+
+      - The stats panel is located with the elemental reference template
+        (the stats window must be open), which gives the elemental anchor.
+      - Each numeric field (position, level, reset, available_points and
+        the attribute points) is snapped to the digit-like connected
+        components found around its current ROI: the box keeps its size,
+        is centred vertically on the digits and aligned horizontally like
+        the text (see ALIGNMENT). It only grows if the digits do not fit.
+      - ROIs without digits move with their neighbour: map_name and play
+        with the coordinate HUD, the attribute buttons with their row. The
+        play button is also matched with images/play_button_area.png.
+
+    Results are offsets at layout.base_resolution, so they can be written
+    back to config['ocr_coordinates'] as they are.
+    """
+    def __init__(self, layout, template_dir=os.path.join('images', 'tofind'), match_threshold=0.7,
+                 search_margin=1.0, padding=4, min_text_height=7, max_text_height=40, max_gap=0.8):
+        self.layout = layout
+        self.template_dir = template_dir
+        self.match_threshold = match_threshold
+        self.search_margin = search_margin
+        self.padding = padding
+        self.min_text_height = min_text_height
+        self.max_text_height = max_text_height
+        self.max_gap = max_gap
+
+    @staticmethod
+    def _gray(region):
+        if region.ndim == 2:
+            return region
+        code = cv2.COLOR_BGRA2GRAY if region.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(np.ascontiguousarray(region), code)
+
+    def _clip(self, bbox, frame):
+        height, width = frame.pixels.shape[:2]
+        x1, y1, x2, y2 = bbox
+        return max(0, int(x1)), max(0, int(y1)), min(width, int(x2)), min(height, int(y2))
+
+    def _search_area(self, bbox, frame, margin=None):
+        """The ROI widened by `margin` times its size on every side"""
+        margin = self.search_margin if margin is None else margin
+        x1, y1, x2, y2 = bbox
+        dx, dy = (x2 - x1) * margin, (y2 - y1) * margin
+        return self._clip((x1 - dx, y1 - dy, x2 + dx, y2 + dy), frame)
+
+    def match_template(self, frame, path, area=None):
+        """
+        Best match of a template (scaled to the window) inside `area`.
+        Returns:
+            tuple: (score, absolute bbox) or (0.0, None)
+        """
+        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            logging.error(f"Calibration template not found at: {path}")
+            return 0.0, None
+        sx, sy = self.layout.scale
+        if (sx, sy) != (1.0, 1.0):
+            template = cv2.resize(template, None, fx=sx, fy=sy, interpolation=cv2.INTER_AREA)
+        area = area or (0, 0, frame.pixels.shape[1], frame.pixels.shape[0])
+        region = self._gray(frame.crop_array(area))
+        if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+            return 0.0, None
+        _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED))
+        th, tw = template.shape
+        return float(score), (area[0] + x, area[1] + y, area[0] + x + tw, area[1] + y + th)
+
+    def find_elemental(self, frame):
+        """Absolute centre of the elemental reference, or None if the stats window is closed"""
+        score, bbox = self.match_template(frame, os.path.join(self.template_dir, 'elemental_reference.png'))
+        if bbox is None or score < self.match_threshold:
+            logging.warning(f"Elemental reference not found (score {score:.2f})")
+            return None
+        return RoiLayout.center(bbox)
+
+    def text_boxes(self, region):
+        """
+        Groups digit-like connected components of a region into text boxes.
+        Components are bright blobs taller than wide within the text height
+        range; neighbours on the same line closer than max_gap digit heights
+        are merged (so "209, 75" is a single box, but not a digit and the
+        icon next to it).
+        Returns:
+            list: (x1, y1, x2, y2) in region coordinates
+        """
+        gray = self._gray(region)
+        if gray.size == 0:
+            return []
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        boxes = []
+        for x, y, w, h, area in stats[1:count]:
+            if not self.min_text_height <= h <= self.max_text_height or w > h or h > 8 * w:
+                continue
+            if w > 2 and not 0.15 <= area / float(w * h) <= 0.9:
+                continue
+            boxes.append([x, y, x + w, y + h])
+
+        # Components arrive in scan order and several lines can share the
+        # area, so merge pairwise until nothing on the same line is close.
+        boxes.sort()
+        merged = True
+        while merged:
+            merged = False
+            for i, first in enumerate(boxes):
+                for second in boxes[i + 1:]:
+                    overlap = min(first[3], second[3]) - max(first[1], second[1])
+                    gap = max(first[0], second[0]) - min(first[2], second[2])
+                    if overlap >= 0.5 * min(first[3] - first[1], second[3] - second[1]) and \
+                            gap <= self.max_gap * max(first[3] - first[1], second[3] - second[1]):
+                        first[:] = [min(first[0], second[0]), min(first[1], second[1]),
+                                    max(first[2], second[2]), max(first[3], second[3])]
+                        boxes.remove(second)
+                        merged = True
+                        break
+                if merged:
+                    break
+        return [tuple(int(v) for v in box) for box in boxes]
+
+    def snap(self, frame, bbox, align='right'):
+        """
+        Moves an absolute ROI onto the nearest text box around it.
+        Returns:
+            tuple: New absolute bbox, or None if no digits were found nearby
+        """
+        area = self._search_area(bbox, frame)
+        boxes = self.text_boxes(frame.crop_array(area))
+        if not boxes:
+            return None
+        cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+        x1, y1, x2, y2 = min(
+            ((area[0] + b[0], area[1] + b[1], area[0] + b[2], area[1] + b[3]) for b in boxes),
+            key=lambda b: ((b[0] + b[2]) / 2 - cx) ** 2 + ((b[1] + b[3]) / 2 - cy) ** 2
+        )
+        pad = self.padding * self.layout.scale[0]
+        width = max(bbox[2] - bbox[0], x2 - x1 + 2 * pad)
+        height = max(bbox[3] - bbox[1], y2 - y1 + 2 * pad)
+        if align == 'left':
+            left = x1 - pad
+        elif align == 'center':
+            left = (x1 + x2) / 2 - width / 2
+        else:
+            left = x2 + pad - width
+        top = (y1 + y2) / 2 - height / 2
+        return round(left), round(top), round(left + width), round(top + height)
+
+    def offset(self, bbox, anchor):
+        """Inverse of RoiLayout._resolve: absolute bbox -> offsets at base resolution"""
+        layout = self.layout
+        origin_x, origin_y = (0, 0) if anchor == 'window' else layout.elemental_offset
+        sx, sy = layout.scale
+        return [
+            round((bbox[0] - layout.window[0]) / sx - origin_x),
+            round((bbox[1] - layout.window[1]) / sy - origin_y),
+            round((bbox[2] - layout.window[0]) / sx - origin_x),
+            round((bbox[3] - layout.window[1]) / sy - origin_y)
+        ]
+
+    @staticmethod
+    def _shift(coords, dx, dy):
+        return [coords[0] + dx, coords[1] + dy, coords[2] + dx, coords[3] + dy]
+
+    def _snap_field(self, frame, coordinates, report, name):
+        """Snaps one field; returns its (dx, dy) shift in base-resolution units"""
+        anchor = self.layout.anchor_for(name)
+        old = coordinates[name]
+        snapped = self.snap(frame, self.layout.resolve(old, anchor), ALIGNMENT.get(name, 'right'))
+        if snapped is None:
+            report[name] = 'kept (no digits found)'
+            return 0, 0
+        coordinates[name] = self.offset(snapped, anchor)
+        report[name] = 'found'
+        return coordinates[name][0] - old[0], coordinates[name][1] - old[1]
+
+    def calibrate(self, frame, ocr_coordinates):
+        """
+        Calibrates a copy of ocr_coordinates on one frame. The layout window
+        must be set; the elemental reference is located on the frame.
+        Returns:
+            tuple: (new ocr_coordinates, {roi name: what happened})
+        """
+        coordinates = copy.deepcopy(ocr_coordinates)
+        report = {}
+
+        # Coordinate HUD; the map name and the play button sit next to it
+        dx, dy = self._snap_field(frame, coordinates, report, 'position')
+        if coordinates.get('map_name'):
+            coordinates['map_name'] = self._shift(coordinates['map_name'], dx, dy)
+            report['map_name'] = f'moved with position ({dx:+}, {dy:+})'
+        if coordinates.get('play'):
+            coordinates['play'] = self._shift(coordinates['play'], dx, dy)
+            report['play'] = f'moved with position ({dx:+}, {dy:+})'
+            prior = self.layout.resolve(coordinates['play'], self.layout.anchor_for('play'))
+            score, bbox = self.match_template(frame, os.path.join(os.path.dirname(self.template_dir),
+                                                                  'play_button_area.png'),
+                                              self._search_area(prior, frame, margin=3))
+            if bbox is not None and score >= self.match_threshold:
+                coordinates['play'] = self.offset(bbox, self.layout.anchor_for('play'))
+                report['play'] = f'found (score {score:.2f})'
+
+        # Stats panel, relative to the elemental reference
+        point = self.find_elemental(frame)
+        if point is None:
+            for name in STATS_FIELDS + ('attributes',):
+                report[name] = 'kept (stats window not open)'
+            return coordinates, report
+        self.layout.set_elemental(point)
+        for name in STATS_FIELDS:
+            if coordinates.get(name):
+                self._snap_field(frame, coordinates, report, name)
+
+        for stat, buttons in coordinates.get('attributes', {}).items():
+            if not buttons.get('points'):
+                continue
+            old = buttons['points']
+            snapped = self.snap(frame, self.layout.resolve(old, 'elemental'))
+            if snapped is None:
+                report[f'attributes.{stat}'] = 'kept (no digits found)'
+                continue
+            buttons['points'] = self.offset(snapped, 'elemental')
+            dy = buttons['points'][1] - old[1]
+            for key in buttons:
+                # Stats raised by chat command have no buttons ([])
+                if key != 'points' and buttons[key]:
+                    buttons[key] = self._shift(buttons[key], 0, dy)
+            report[f'attributes.{stat}'] = f'found, buttons moved {dy:+} vertically'
+        return coordinates, report
+
+    def validate(self, frame, config, coordinates):
+        """
+        Checks a calibrated table before it is written: the config must still
+        validate and every ROI must fall inside the frame.
+        Returns:
+            list: Problems found (empty if the table can be stored)
+        """
+        candidate = dict(config, ocr_coordinates=coordinates)
+        errors = validate_config(candidate)
+        height, width = frame.pixels.shape[:2]
+
+        def check(name, coords, anchor):
+            bbox = self.layout.resolve(coords, anchor)
+            if bbox is None:
+                return
+            if bbox[0] < 0 or bbox[1] < 0 or bbox[2] > width or bbox[3] > height:
+                errors.append(f"ocr_coordinates['{name}'] {bbox} is outside the frame")
+            if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+                errors.append(f"ocr_coordinates['{name}'] {bbox} is empty")
+
+        for name, coords in coordinates.items():
+            if name != 'attributes' and coords:
+                check(name, coords, self.layout.anchor_for(name))
+        for stat, buttons in coordinates.get('attributes', {}).items():
+            for key, coords in buttons.items():
+                if coords:
+                    check(f'attributes.{stat}.{key}', coords, 'elemental')
+        return errors
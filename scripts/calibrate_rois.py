@@ -0,0 +1,118 @@
+"""
+Finds the OCR regions automatically and stores them in json/config.json
+(ocr_coordinates), replacing the manual rectangles of scripts/coordinates.py.
+
+Open the game with the stats window ('c') visible, then run the script. It
+captures the screen (or reads --image), locates the coordinate HUD, the
+stats panel fields and the play button, validates the new table and prints
+it next to the current one. An overlay with the new ROIs is written to
+logs/calibration.png for a visual check. With --write, the table is stored
+in json/config.json.
+
+--learn takes pixel probes whose state is known on the captured screen
+(e.g. play_active while play is on) and stores the colour of their area
+on the calibrated layout as the probe colour.
+
+Usage:
+    python scripts/calibrate_rois.py [--image screenshot.png] [--learn play_active ...] [--write]
+"""
+import argparse
+import json
+import os
+import sys
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from configfile import CONFIG_PATH, save_config
+from framecapture import Frame, FrameGrabber
+from layout import RoiLayout, detect_game_window
+from pixelprobe import PixelProbes
+from roicalibration import RoiCalibrator
+
+OVERLAY_PATH = os.path.join('logs', 'calibration.png')
+
+
+def draw_overlay(frame, layout, coordinates, path):
+    """Draws every calibrated ROI on a copy of the frame"""
+    image = cv2.cvtColor(frame.pixels, cv2.COLOR_BGRA2BGR) if frame.pixels.shape[2] == 4 else frame.pixels.copy()
+    boxes = [(name, coords, layout.anchor_for(name)) for name, coords in coordinates.items() if name != 'attributes']
+    for stat, buttons in coordinates.get('attributes', {}).items():
+        boxes += [(f'{stat}.{key}', coords, 'elemental') for key, coords in buttons.items()]
+    for name, coords, anchor in boxes:
+        bbox = layout.resolve(coords, anchor) if coords else None
+        if bbox:
+            cv2.rectangle(image, bbox[:2], bbox[2:], (0, 255, 0), 1)
+            cv2.putText(image, name, (bbox[0], bbox[1] - 3), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (0, 255, 0), 1)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cv2.imwrite(path, image)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='Calibrate on a screenshot of the game window instead of the screen')
+    parser.add_argument('--learn', nargs='+', default=[], metavar='PROBE',
+                        help='Learn the colour of these pixel probes from the captured screen')
+    parser.add_argument('--write', action='store_true', help='Store the calibrated ROIs in json/config.json')
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    layout_settings = config.get('layout', {})
+    layout = RoiLayout(config['ocr_coordinates'], layout_settings)
+
+    if args.image:
+        pixels = cv2.imread(args.image)
+        if pixels is None:
+            print(f"Cannot read {args.image}")
+            return 1
+        frame = Frame(1, 0, pixels)
+        layout.set_window((0, 0, pixels.shape[1], pixels.shape[0]))
+    else:
+        frame = FrameGrabber().grab()
+        layout.set_window(detect_game_window(layout_settings.get('window_title')))
+
+    calibrator = RoiCalibrator(layout)
+    coordinates, report = calibrator.calibrate(frame, config['ocr_coordinates'])
+
+    for name, result in report.items():
+        if name.startswith('attributes.'):
+            stat = name.split('.', 1)[1]
+            old, new = config['ocr_coordinates']['attributes'][stat]['points'], coordinates['attributes'][stat]['points']
+        elif name == 'attributes':
+            old = new = ''
+        else:
+            old, new = config['ocr_coordinates'].get(name), coordinates.get(name)
+        print(f"  {name:<22} {str(old):<24} -> {str(new):<24} {result}")
+
+    draw_overlay(frame, layout, coordinates, OVERLAY_PATH)
+    print(f"Overlay written to {OVERLAY_PATH}")
+
+    errors = calibrator.validate(frame, config, coordinates)
+    if errors:
+        print("Calibration rejected:")
+        for error in errors:
+            print(f"  - {error}")
+        return 1
+
+    # Probes are learned on the calibrated table
+    layout.ocr_coordinates = coordinates
+    layout.rebuild()
+    probes = PixelProbes(layout, config.get('pixel_probes'))
+    for name in args.learn:
+        if probes.learn(frame, name):
+            config['pixel_probes'][name]['color'] = probes.probes[name]['color']
+            print(f"  probe {name:<16} colour {probes.probes[name]['color']}")
+        else:
+            print(f"  probe {name:<16} has no area on this layout, not learned")
+
+    if args.write:
+        config['ocr_coordinates'] = coordinates
+        save_config(config)
+        learned = ' and pixel_probes' if args.learn else ''
+        print(f"Updated ocr_coordinates{learned} in {CONFIG_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
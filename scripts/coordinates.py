@@ -1,10 +1,11 @@
 import tkinter as tk
-from mss import mss
-from PIL import ImageTk, Image
 
 class CoordinateSelector:
     def __init__(self):
         self.root = tk.Tk()
+        # Screen capture and image libraries are only needed once the window is up
+        from mss import mss
+        from PIL import ImageTk, Image
         self.canvas = tk.Canvas(self.root)
         self.canvas.pack(fill="both", expand=True)
         
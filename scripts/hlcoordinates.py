@@ -1,13 +1,14 @@
 import tkinter as tk
 from PIL import ImageGrab
-import cv2
-import numpy as np
 import time
 class OCRHighlighter:
    def __init__(self):
        root = tk.Tk()
        root.attributes('-alpha', 0.3, '-topmost', True)
        root.overrideredirect(True)
+       # OpenCV/NumPy are only needed once the overlay is up
+       import cv2
+       import numpy as np
 
        coords = {
            'position': [260, 23, 330, 49],
@@ -0,0 +1,85 @@
+"""
+Labels the ROI crops captured by the bot (config['corpus_capture']).
+
+Shows every pending crop enlarged with the OCR reading pre-filled.
+Enter confirms the label, Delete discards the crop, Escape skips it.
+
+Usage:
+    python scripts/label_corpus.py [--corpus images/corpus] [--field level]
+"""
+import argparse
+import os
+import sys
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ocrcorpus import OCRCorpus
+
+
+class CorpusLabeler:
+    def __init__(self, corpus, fields):
+        self.corpus = corpus
+        self.queue = [
+            (field, filename, suggestion)
+            for field in fields
+            for filename, suggestion in corpus.pending(field).items()
+        ]
+        self.current = None
+
+        self.root = tk.Tk()
+        self.root.title("OCR corpus labeler")
+        self.info = tk.Label(self.root)
+        self.info.pack()
+        self.canvas = tk.Label(self.root)
+        self.canvas.pack()
+        self.entry = tk.Entry(self.root, font=('Consolas', 16))
+        self.entry.pack(fill='x')
+        self.entry.focus_set()
+
+        self.root.bind('<Return>', self.on_confirm)
+        self.root.bind('<Delete>', self.on_discard)
+        self.root.bind('<Escape>', self.on_skip)
+
+        self.show_next()
+        self.root.mainloop()
+
+    def show_next(self):
+        if not self.queue:
+            print("No pending crops left")
+            self.root.destroy()
+            return
+
+        self.current = self.queue.pop(0)
+        field, filename, suggestion = self.current
+        img = Image.open(self.corpus.image_path(field, filename))
+        img = img.resize((img.width * 4, img.height * 4), Image.NEAREST)
+        self.photo = ImageTk.PhotoImage(img)
+        self.canvas.configure(image=self.photo)
+        self.info.configure(text=f"{field} - {filename} ({len(self.queue)} left)")
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, suggestion)
+
+    def on_confirm(self, event):
+        field, filename, _ = self.current
+        self.corpus.set_label(field, filename, self.entry.get().strip())
+        self.show_next()
+
+    def on_discard(self, event):
+        field, filename, _ = self.current
+        self.corpus.discard(field, filename)
+        self.show_next()
+
+    def on_skip(self, event):
+        self.show_next()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join('images', 'corpus'))
+    parser.add_argument('--field', help='Only label this field')
+    args = parser.parse_args()
+
+    corpus = OCRCorpus(args.corpus)
+    CorpusLabeler(corpus, [args.field] if args.field else corpus.fields())
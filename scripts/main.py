@@ -1,4 +1,5 @@
 import os
+import sys
 import pyautogui
 import pytesseract
 import time
@@ -12,6 +13,9 @@ from pynput import keyboard
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from retrypolicy import RetryPolicy
+
 
 class GameBot:
     def __init__(self):
@@ -24,6 +28,7 @@ class GameBot:
         self.load_config('config.json')
         self.initialize_game_state()
         self.setup_screen()
+        self.stats_retry = RetryPolicy('read_stats', max_attempts=5, base_delay=0.2, max_delay=2.0, deadline=15)
         
     def setup_keyboard_listener(self):
         def on_press(key):
@@ -157,6 +162,10 @@ class GameBot:
             return 0
 
     def read_stats(self):
+        """Reads level and resets, retrying bad reads within a bounded budget"""
+        return self.stats_retry.run(self._read_stats_once)
+
+    def _read_stats_once(self):
         stats_check = ImageGrab.grab(bbox=self.config['ocr_coordinates']['level'])
         if stats_check.getpixel((0, 0))[0] < 100:
             pyautogui.press('c')
@@ -177,10 +186,11 @@ class GameBot:
                 logging.info(f"Reset got from image: {reset_numeric_value}")
                 
                 if reset_numeric_value < self.resets:
-                    logging.error("Probably bad read.")
-                    return self.read_stats()
+                    raise ValueError(f"Probably bad read: reset {reset_numeric_value} < {self.resets}")
                 self.resets = reset_numeric_value
 
+        except ValueError:
+            raise
         except Exception as e:
             logging.error(f"Error reading resets: {e}")
 
@@ -199,15 +209,16 @@ class GameBot:
                 logging.info(f"Level got from image: {level_numeric_value}")
                 
                 if level_numeric_value < self.level or level_numeric_value > self.config['max_level']:
-                    logging.error("Probably bad read.")
-                    return self.read_stats()
+                    raise ValueError(f"Probably bad read: level {level_numeric_value}")
                 self.level = level_numeric_value
 
+        except ValueError:
+            raise
         except Exception as e:
             logging.error(f"Error reading level: {e}")
 
         if self.level == 0 and self.resets == 0:
-            return self.read_stats()
+            raise ValueError("Level and resets still at 0")
 
         pyautogui.press('c')
         return self.level, self.resets
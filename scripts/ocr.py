@@ -27,4 +27,5 @@ def get_reset_number(image_path):
     print(f"Detected text: '{text}'")
     return text
 
-result = get_reset_number('reset_test.png')
\ No newline at end of file
+if __name__ == "__main__":
+    result = get_reset_number('reset_test.png')
\ No newline at end of file
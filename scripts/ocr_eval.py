@@ -0,0 +1,122 @@
+"""
+Evaluates every OCR backend / preprocessing profile combination on the
+labelled corpus and reports accuracy and throughput (crops/sec).
+
+Results are written to logs/ocr_eval.json. With --adopt, the fastest
+combination per field that stays within --tolerance of the best accuracy
+is stored in json/config.json (ocr_profiles / ocr_backends).
+
+Usage:
+    python scripts/ocr_eval.py [--corpus images/corpus] [--field level] [--tolerance 0.0] [--adopt]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ocrcorpus import OCRCorpus
+from configfile import CONFIG_PATH, save_config
+from ocrengine import OCREngine, OCR_BACKENDS
+
+RESULTS_PATH = os.path.join('logs', 'ocr_eval.json')
+
+
+def digits(text):
+    return ''.join(filter(str.isdigit, text))
+
+
+def evaluate(engine, field, samples, profile, backend):
+    """Returns accuracy and crops/sec for one combination"""
+    hits = 0
+    start = time.perf_counter()
+    for image, expected in samples:
+        text = engine.read(image, field, profile=profile, backend=backend)
+        if digits(text) == digits(expected):
+            hits += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'profile': profile,
+        'backend': backend,
+        'accuracy': hits / len(samples),
+        'crops_per_sec': len(samples) / elapsed if elapsed > 0 else float('inf')
+    }
+
+
+def evaluate_field(engine, field, samples, profiles, backends):
+    """Evaluates every profile/backend combination, most accurate (then fastest) first"""
+    results = [
+        evaluate(engine, field, samples, profile, backend)
+        for profile in profiles
+        for backend in backends
+    ]
+    results.sort(key=lambda r: (-r['accuracy'], -r['crops_per_sec']))
+    return results
+
+
+def choose(results, tolerance):
+    """Fastest combination within `tolerance` of the best accuracy"""
+    best_accuracy = results[0]['accuracy']
+    return max(
+        (r for r in results if r['accuracy'] >= best_accuracy - tolerance),
+        key=lambda r: r['crops_per_sec']
+    )
+
+
+def print_results(field, samples, results, chosen, current=None):
+    print(f"{field} ({len(samples)} crops)")
+    for r in results:
+        marker = '*' if r is chosen else ('=' if (r['profile'], r['backend']) == current else ' ')
+        print(f"  {marker} {r['profile']:<10} {r['backend']:<20} "
+              f"acc={r['accuracy']:6.1%}  {r['crops_per_sec']:7.1f} crops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join('images', 'corpus'))
+    parser.add_argument('--field', help='Only evaluate this field')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Accuracy drop allowed against the most accurate combination')
+    parser.add_argument('--adopt', action='store_true', help='Store the chosen combinations in json/config.json')
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    engine = OCREngine.from_config(config)
+    corpus = OCRCorpus(args.corpus)
+
+    report = {}
+    for field in ([args.field] if args.field else corpus.fields()):
+        samples = corpus.samples(field)
+        if not samples:
+            continue
+
+        results = evaluate_field(engine, field, samples, engine.preprocessor.profiles, OCR_BACKENDS)
+        chosen = choose(results, args.tolerance)
+        current = (engine.preprocessor.profile_for(field), engine.backend_for(field))
+        report[field] = {'samples': len(samples), 'current': current, 'chosen': chosen, 'results': results}
+        print_results(field, samples, results, chosen, current)
+
+    if not report:
+        print(f"No labelled crops found under {args.corpus}")
+        return
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'timestamp': time.time(), 'fields': report}, f, indent=4)
+    print(f"Results written to {RESULTS_PATH}  (* chosen, = current)")
+
+    if args.adopt:
+        for field, entry in report.items():
+            config.setdefault('ocr_profiles', {})[field] = entry['chosen']['profile']
+            config.setdefault('ocr_backends', {})[field] = entry['chosen']['backend']
+        save_config(config)
+        print(f"Updated ocr_profiles/ocr_backends in {CONFIG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
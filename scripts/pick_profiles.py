@@ -0,0 +1,62 @@
+"""
+Picks the cheapest preprocessing profile per field that keeps OCR accuracy
+on a labelled crop set.
+
+Uses the verified labels of the OCR corpus (see ocrcorpus.py and
+scripts/label_corpus.py) and each field's configured OCR backend. The
+evaluation is the one of scripts/ocr_eval.py restricted to that backend;
+use ocr_eval.py to compare backends as well.
+
+Usage:
+    python scripts/pick_profiles.py [--corpus images/corpus] [--tolerance 0.0] [--write]
+"""
+import argparse
+import json
+import os
+import sys
+
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from configfile import CONFIG_PATH, save_config
+from ocrcorpus import OCRCorpus
+from ocrengine import OCREngine
+from ocr_eval import choose, evaluate_field, print_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join('images', 'corpus'))
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Accuracy drop allowed against the most accurate profile')
+    parser.add_argument('--write', action='store_true', help='Store the chosen profiles in json/config.json')
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    engine = OCREngine.from_config(config)
+    corpus = OCRCorpus(args.corpus)
+
+    chosen = {}
+    for field in corpus.fields():
+        samples = corpus.samples(field)
+        if not samples:
+            continue
+        results = evaluate_field(engine, field, samples, engine.preprocessor.profiles, [engine.backend_for(field)])
+        best = choose(results, args.tolerance)
+        chosen[field] = best['profile']
+        print_results(field, samples, results, best)
+
+    if not chosen:
+        print(f"No labelled crops found under {args.corpus}")
+        return
+
+    if args.write:
+        config.setdefault('ocr_profiles', {}).update(chosen)
+        save_config(config)
+        print(f"Updated ocr_profiles in {CONFIG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
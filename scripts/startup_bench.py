@@ -0,0 +1,88 @@
+"""
+Measures the import cost of the bot and its tools with `python -X importtime`.
+
+Every run prints the cumulative import time per module and the slowest
+imports. It is also appended to logs/startup_bench.json, so regressions
+show up next to earlier runs. With --budget-ms the script exits with
+status 1 when a module takes longer to import than the budget.
+
+Usage:
+    python scripts/startup_bench.py [--module gamebot --module ocrengine] [--top 10] [--budget-ms 150]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join('logs', 'startup_bench.json')
+DEFAULT_MODULES = ['gamebot', 'ocrengine', 'ocrcorpus', 'framecapture']
+
+
+def import_times(module):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns:
+        list: (module name, self us, cumulative us) for every import
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', action='append', help='Module to import (repeatable)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to show per module')
+    parser.add_argument('--budget-ms', type=float, help='Fail if a module import exceeds this')
+    args = parser.parse_args()
+
+    run = {'timestamp': time.time(), 'python': sys.version.split()[0], 'modules': {}}
+    over_budget = []
+    for module in args.module or DEFAULT_MODULES:
+        try:
+            times = import_times(module)
+        except RuntimeError as e:
+            print(e)
+            continue
+        total_ms = next((cumulative for name, _, cumulative in times if name == module), 0) / 1000
+        slowest = sorted(times, key=lambda item: item[1], reverse=True)[:args.top]
+        run['modules'][module] = {
+            'total_ms': round(total_ms, 1),
+            'slowest': [{'module': name, 'self_ms': round(self_us / 1000, 1)} for name, self_us, _ in slowest]
+        }
+
+        print(f"{module}: {total_ms:.1f} ms")
+        for name, self_us, _ in slowest:
+            print(f"    {self_us / 1000:8.1f} ms  {name}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(module)
+
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    history = []
+    if os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH) as f:
+            history = json.load(f)
+    history.append(run)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(history, f, indent=4)
+    print(f"Results appended to {RESULTS_PATH}")
+
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
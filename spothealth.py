@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import time
+
+
+class SpotMonitor:
+    """
+    Detects a crowded farming spot and remembers how often each spot was busy.
+
+    A spot counts as crowded when:
+      - the level has not gone up for longer than expected: stagnant_seconds,
+        or stagnant_factor times the time per level at the spot's measured
+        rate, whichever is longer. Without a measured rate a slow level is
+        normal at high levels, so stagnation only counts while the players
+        probe also sees someone; or
+      - the players probe has seen other players around the character on
+        players_cycles consecutive checks.
+    Spot health (visits and busy visits per spot) is kept in
+    json/spot_health.json. A visit starts whenever farming (re)starts at a
+    spot, which also restarts the stagnation timer. apply_to() hands the
+    busy ratio to the ProgressionPlan, so the next session ranks spots that
+    are usually busy last.
+    """
+    def __init__(self, path=os.path.join('json', 'spot_health.json'), stagnant_seconds=300, stagnant_factor=3.0,
+                 players_cycles=2, cooldown=900):
+        self.path = path
+        self.stagnant_seconds = stagnant_seconds
+        self.stagnant_factor = stagnant_factor
+        self.players_cycles = players_cycles
+        self.cooldown = cooldown
+        self.health = self._load()
+        self._spot = None
+        self._visit = None
+        self._level = None
+        self._since = 0
+        self._players_seen = 0
+
+    @staticmethod
+    def key(map_name, spot):
+        return f"{map_name}:{spot[0]},{spot[1]}"
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading spot health: {e}")
+        return {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.health, f, indent=4)
+        except Exception as e:
+            logging.error(f"Error saving spot health: {e}")
+
+    def busy_ratio(self, map_name, spot):
+        """Share of visits to the spot that ended because it was crowded"""
+        entry = self.health.get(self.key(map_name, spot))
+        return entry['busy'] / entry['visits'] if entry and entry.get('visits') else 0.0
+
+    def check(self, map_name, spot, level, players_nearby=None, expected_rate=None, visit=None):
+        """
+        One check per cycle while farming at `spot`.
+        Args:
+            players_nearby: Players probe result (None if not configured)
+            expected_rate: Levels/hour measured at this spot, if known
+            visit: Token of the current farming stint (e.g. when it started); a new
+                   token starts a new visit even at the same spot
+        Returns:
+            str: Reason the spot is crowded, or None
+        """
+        now = time.time()
+        key = self.key(map_name, spot)
+        entry = self.health.setdefault(key, {'checks': 0, 'visits': 0, 'busy': 0, 'last_busy': None})
+        if key != self._spot or visit != self._visit:
+            entry['visits'] = entry.get('visits', 0) + 1
+            self._players_seen = 0
+            self._spot, self._visit, self._level, self._since = key, visit, level, now
+        elif self._level is None or level > self._level:
+            self._level, self._since = level, now
+
+        limit = self.stagnant_seconds
+        if expected_rate:
+            limit = max(limit, self.stagnant_factor * 3600 / expected_rate)
+        self._players_seen = self._players_seen + 1 if players_nearby else 0
+
+        reason = None
+        stagnant = now - self._since >= limit and (expected_rate or players_nearby)
+        if stagnant:
+            reason = f"no level up for {now - self._since:.0f}s"
+        elif self._players_seen >= self.players_cycles:
+            reason = f"players nearby for {self._players_seen} checks"
+
+        entry['checks'] += 1
+        if reason:
+            entry['busy'] += 1
+            entry['last_busy'] = now
+            self._spot = None
+        self.save()
+        return reason
+
+    def apply_to(self, plan):
+        """Passes the stored busy ratio of every spot to the progression plan"""
+        for bracket in plan.brackets:
+            for spot in bracket['spots']:
+                plan.set_busy_ratio(bracket['map'], spot['location'], self.busy_ratio(bracket['map'], spot['location']))
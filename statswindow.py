@@ -0,0 +1,94 @@
+import logging
+import os
+
+from lazyimport import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+class StatsWindowDetector:
+    """
+    Tells whether the stats window ('c') is open on a frame.
+
+    The first time the elemental reference template is matched, a tiny
+    grayscale signature of that patch is stored; later checks compare the
+    patch against it (a few microseconds) and only fall back to template
+    matching around the known position when the signature differs.
+    Results are cached per frame id.
+    """
+    def __init__(self, layout, template_path=os.path.join('images', 'tofind', 'elemental_reference.png'),
+                 match_threshold=0.7, signature_tolerance=18.0):
+        self.layout = layout
+        self.match_threshold = match_threshold
+        self.signature_tolerance = signature_tolerance
+        self.template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+        if self.template is None:
+            logging.error(f"Stats window template not found at: {template_path}")
+        self.signature = None
+        self._cache = (None, None)
+
+    def _patch_bbox(self, margin):
+        """Area around the elemental reference, widened by `margin` template sizes"""
+        layout = self.layout
+        if layout.window is None or not layout.has_elemental or self.template is None:
+            return None
+        th, tw = self.template.shape
+        cx = layout.window[0] + layout.elemental_offset[0] * layout.scale[0]
+        cy = layout.window[1] + layout.elemental_offset[1] * layout.scale[1]
+        half_w = tw * layout.scale[0] * (0.5 + margin)
+        half_h = th * layout.scale[1] * (0.5 + margin)
+        return max(0, int(cx - half_w)), max(0, int(cy - half_h)), int(cx + half_w), int(cy + half_h)
+
+    @staticmethod
+    def _gray(region):
+        return cv2.cvtColor(np.ascontiguousarray(region), cv2.COLOR_BGRA2GRAY)
+
+    def _signature_of(self, frame):
+        bbox = self._patch_bbox(0)
+        if bbox is None:
+            return None
+        patch = frame.crop_array(bbox)
+        if patch.size == 0:
+            return None
+        return cv2.resize(self._gray(patch), (16, 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _template_match(self, frame):
+        if self.template is None:
+            return False
+        bbox = self._patch_bbox(1)
+        region = frame.crop_array(bbox) if bbox else frame.pixels
+        template = self.template
+        if self.layout.scale != (1.0, 1.0):
+            sx, sy = self.layout.scale
+            template = cv2.resize(template, None, fx=sx, fy=sy, interpolation=cv2.INTER_AREA)
+        if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+            return False
+        _, score, _, _ = cv2.minMaxLoc(cv2.matchTemplate(self._gray(region), template, cv2.TM_CCOEFF_NORMED))
+        return score >= self.match_threshold
+
+    def is_open(self, frame):
+        """
+        Returns:
+            bool: True if the stats window is open on this frame
+        """
+        cached_id, cached_result = self._cache
+        if cached_id == frame.id:
+            return cached_result
+
+        signature = self._signature_of(frame)
+        if self.signature is not None and signature is not None and \
+                float(np.abs(signature - self.signature).mean()) <= self.signature_tolerance:
+            result = True
+        else:
+            result = self._template_match(frame)
+            if result and self.signature is None and signature is not None:
+                self.signature = signature
+
+        self._cache = (frame.id, result)
+        return result
+
+    def reset(self):
+        """Drops the learned signature (e.g. after the layout changed)"""
+        self.signature = None
+        self._cache = (None, None)
@@ -0,0 +1,91 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    ts REAL NOT NULL,
+    reset INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    map TEXT,
+    spot_x INTEGER,
+    spot_y INTEGER,
+    bracket INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+"""
+
+# Level gained between consecutive samples taken at the same spot within
+# one reset; gaps longer than :max_gap (walks, restarts) are not counted.
+RATES_QUERY = """
+SELECT map, spot_x, spot_y, bracket, SUM(level - prev_level), SUM(ts - prev_ts)
+FROM (
+    SELECT *, LAG(ts) OVER w AS prev_ts, LAG(level) OVER w AS prev_level, LAG(reset) OVER w AS prev_reset,
+           LAG(map) OVER w AS prev_map, LAG(spot_x) OVER w AS prev_x, LAG(spot_y) OVER w AS prev_y
+    FROM samples WHERE ts >= :since WINDOW w AS (ORDER BY ts)
+)
+WHERE prev_ts IS NOT NULL AND reset = prev_reset AND map = prev_map AND spot_x = prev_x AND spot_y = prev_y
+      AND ts - prev_ts <= :max_gap AND level >= prev_level
+GROUP BY map, spot_x, spot_y, bracket
+"""
+
+
+class Telemetry:
+    """
+    Level/reset samples taken while farming, stored in SQLite
+    (json/telemetry.db), and the measured levels/hour per spot and bracket.
+
+    apply_to() feeds the measured rates to the ProgressionPlan, which then
+    picks the fastest spot of the bracket for the current level.
+    """
+    def __init__(self, path=os.path.join('json', 'telemetry.db'), min_seconds=600, max_gap=120, max_age_days=30):
+        self.path = path
+        self.min_seconds = min_seconds
+        self.max_gap = max_gap
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def record(self, level, resets, map_name, spot, bracket):
+        """Stores one sample; only meaningful while farming at `spot`"""
+        try:
+            with self._lock, self.db:
+                self.db.execute("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (time.time(), resets, level, map_name, spot[0], spot[1], bracket))
+        except Exception as e:
+            logging.error(f"Error recording telemetry: {e}")
+
+    def rates(self):
+        """
+        Returns:
+            list: {'map', 'location', 'bracket', 'levels_per_hour', 'hours'} for every
+                  spot/bracket with at least min_seconds of farming time
+        """
+        since = time.time() - self.max_age_days * 86400
+        with self._lock:
+            rows = self.db.execute(RATES_QUERY, {'since': since, 'max_gap': self.max_gap}).fetchall()
+        return [{
+            'map': map_name,
+            'location': (x, y),
+            'bracket': bracket,
+            'levels_per_hour': gained * 3600 / seconds,
+            'hours': seconds / 3600
+        } for map_name, x, y, bracket, gained, seconds in rows if seconds and seconds >= self.min_seconds]
+
+    def apply_to(self, plan):
+        """Replaces the expected XP rate of every measured spot with its levels/hour"""
+        rates = self.rates()
+        for rate in rates:
+            plan.record_xp_rate(rate['map'], rate['location'], rate['levels_per_hour'], weight=1.0,
+                               level=rate['bracket'])
+        if rates:
+            summary = ', '.join(f"{r['map']}{r['location']}={r['levels_per_hour']:.1f}/h" for r in rates)
+            logging.info(f"Measured level rates: {summary}")
+        return rates
+
+    def close(self):
+        with self._lock:
+            self.db.close()